@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,8 +19,75 @@ DB_CONFIG = {
     "cursorclass": None,
 }
 
+# MySQL 连接池：工作进程启动时预先建立 MIN_SIZE 个连接，空闲超过 IDLE_TIMEOUT 的连接在保留 MIN_SIZE 个之外被关闭，
+# 闲置超过 PING_AFTER 秒的连接借出前先 ping；等待空闲连接超过 CHECKOUT_TIMEOUT 秒返回 503
+DB_POOL_MIN_SIZE = int(os.environ.get("BLOG_DB_POOL_MIN", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("BLOG_DB_POOL_MAX", "16"))
+DB_POOL_MAX_LIFETIME = float(os.environ.get("BLOG_DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_IDLE_TIMEOUT = float(os.environ.get("BLOG_DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.environ.get("BLOG_DB_POOL_CHECKOUT_TIMEOUT", "5"))
+DB_POOL_PING_AFTER = float(os.environ.get("BLOG_DB_POOL_PING_AFTER", "1"))
+
 SECRET_KEY = os.environ.get("BLOG_SECRET_KEY", "dev-secret-key")
 SESSION_EXPIRE_SECONDS = int(os.environ.get("BLOG_SESSION_EXPIRE", "86400"))
 MAX_REQUEST_SIZE = int(os.environ.get("BLOG_MAX_REQ", "1048576"))
+MAX_HEADER_SIZE = int(os.environ.get("BLOG_MAX_HEADER", "16384"))
+RECV_BUFFER_SIZE = int(os.environ.get("BLOG_RECV_BUFFER", "8192"))
 STATIC_ROOT = os.path.join(BASE_DIR, "server", "static")
 TEMPLATE_ROOT = os.path.join(BASE_DIR, "server", "templates")
+WORKER_THREADS = int(os.environ.get("BLOG_WORKERS", "32"))
+CONNECTION_QUEUE_SIZE = int(os.environ.get("BLOG_CONN_QUEUE", "256"))
+KEEPALIVE_TIMEOUT = float(os.environ.get("BLOG_KEEPALIVE_TIMEOUT", "5"))
+KEEPALIVE_MAX_REQUESTS = int(os.environ.get("BLOG_KEEPALIVE_MAX_REQUESTS", "100"))
+# 慢速客户端防护：请求头、请求体须在各自时限内收完，发送每组数据不得超过写超时
+HEADER_TIMEOUT = float(os.environ.get("BLOG_HEADER_TIMEOUT", "10"))
+BODY_TIMEOUT = float(os.environ.get("BLOG_BODY_TIMEOUT", "30"))
+WRITE_TIMEOUT = float(os.environ.get("BLOG_WRITE_TIMEOUT", "30"))
+# 从收到请求第一个字节起算的整体截止时间，处理器可通过 request.remaining_time() 查询
+REQUEST_DEADLINE = float(os.environ.get("BLOG_REQUEST_DEADLINE", "30"))
+REAPER_INTERVAL = float(os.environ.get("BLOG_REAPER_INTERVAL", "0.5"))
+# threaded: 每连接占用一个工作线程；asyncio: 事件循环处理套接字 I/O，处理器在线程池执行
+SERVER_ENGINE = os.environ.get("BLOG_SERVER_ENGINE", "threaded")
+# 大于 0 时以多进程模式运行，各工作进程通过 SO_REUSEPORT 共享端口
+PREFORK_WORKERS = int(os.environ.get("BLOG_PREFORK_WORKERS", "0"))
+METRICS_SHARED_DIR = os.environ.get("BLOG_METRICS_DIR", os.path.join(tempfile.gettempdir(), "tcp_blog_metrics"))
+METRICS_PUBLISH_INTERVAL = float(os.environ.get("BLOG_METRICS_PUBLISH_INTERVAL", "1"))
+STREAM_CHUNK_SIZE = int(os.environ.get("BLOG_STREAM_CHUNK", "8192"))
+COMPRESSION_ENABLED = os.environ.get("BLOG_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.environ.get("BLOG_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.environ.get("BLOG_COMPRESSION_LEVEL", "6"))
+COMPRESSION_TYPES = [
+    item.strip()
+    for item in os.environ.get(
+        "BLOG_COMPRESSION_TYPES",
+        "text/html,text/css,text/plain,application/json,application/javascript,image/svg+xml",
+    ).split(",")
+    if item.strip()
+]
+STATIC_MAX_AGE = int(os.environ.get("BLOG_STATIC_MAX_AGE", "3600"))
+STATIC_CACHE_MAX_FILE = int(os.environ.get("BLOG_STATIC_CACHE_MAX_FILE", "262144"))
+STATIC_CHECK_INTERVAL = float(os.environ.get("BLOG_STATIC_CHECK_INTERVAL", "2"))
+# 匿名访问页面的整页缓存，写操作会主动失效；多进程模式下其他进程的副本依赖 TTL 过期
+PAGE_CACHE_ENABLED = os.environ.get("BLOG_PAGE_CACHE", "1") == "1"
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("BLOG_PAGE_CACHE_MAX_ENTRIES", "512"))
+PAGE_CACHE_TTL = float(os.environ.get("BLOG_PAGE_CACHE_TTL", "30"))
+# 按客户端 IP 的令牌桶限流，格式为 "每秒补充令牌数:桶容量"，速率为 0 表示该类别不限流
+RATE_LIMIT_ENABLED = os.environ.get("BLOG_RATE_LIMIT", "1") == "1"
+RATE_LIMIT_RULES = {
+    name: tuple(float(part) for part in os.environ.get(f"BLOG_RATE_LIMIT_{name.upper()}", default).split(":"))
+    for name, default in (("auth", "1:5"), ("search", "5:20"), ("default", "50:100"))
+}
+RATE_LIMIT_SWEEP_INTERVAL = float(os.environ.get("BLOG_RATE_LIMIT_SWEEP_INTERVAL", "30"))
+# 文章全文检索：内存倒排索引定期按 updated_at 与数据库同步，并保存快照加速重启
+SEARCH_ENGINE_ENABLED = os.environ.get("BLOG_SEARCH_ENGINE", "1") == "1"
+SEARCH_SNAPSHOT_PATH = os.environ.get("BLOG_SEARCH_SNAPSHOT", os.path.join(BASE_DIR, "data", "search_index.json"))
+SEARCH_SYNC_INTERVAL = float(os.environ.get("BLOG_SEARCH_SYNC_INTERVAL", "10"))
+SEARCH_SNAPSHOT_INTERVAL = float(os.environ.get("BLOG_SEARCH_SNAPSHOT_INTERVAL", "300"))
+# post_deletions 中删除记录的保留秒数，过期记录随快照保存清理
+SEARCH_DELETION_RETENTION = int(os.environ.get("BLOG_SEARCH_DELETION_RETENTION", str(7 * 24 * 3600)))
+# 首页与搜索页的分类列表缓存时间（秒），本进程的发文、编辑、删除会立即失效
+CATEGORY_CACHE_TTL = float(os.environ.get("BLOG_CATEGORY_CACHE_TTL", "60"))
+# 关注流时间线：粉丝数超过 FANOUT_LIMIT 的作者改为读取时合并，关注时最多回填作者最近 BACKFILL_LIMIT 篇文章
+TIMELINE_FANOUT_LIMIT = int(os.environ.get("BLOG_TIMELINE_FANOUT_LIMIT", "5000"))
+TIMELINE_BACKFILL_LIMIT = int(os.environ.get("BLOG_TIMELINE_BACKFILL_LIMIT", "1000"))
+TIMELINE_CELEBRITY_REFRESH = float(os.environ.get("BLOG_TIMELINE_CELEBRITY_REFRESH", "60"))
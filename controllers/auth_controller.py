@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from repository.db import PoolTimeout
 from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 from server.session import session_store
@@ -25,6 +26,9 @@ def register(request: HttpRequest) -> HttpResponse:
             nickname=data["nickname"],
             email=data.get("email"),
         )
+    except PoolTimeout:
+        # 交给 process_request 统一返回 503
+        raise
     except Exception as exc:
         return HttpResponse.json({"error": f"注册失败: {exc}"}, status=400)
     return HttpResponse.json({"user_id": user_id}, status=201)
@@ -4,13 +4,29 @@ from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 from services import comment_service
 
-from .utils import require_login
+from .utils import page_payload, read_page, require_login
 
 
 def list_comments(request: HttpRequest) -> HttpResponse:
     post_id = int(request.path_params.get("post_id"))
-    comments = comment_service.list_comments(post_id)
-    return HttpResponse.json({"items": comments})
+    limit, after, error = read_page(request)
+    if error:
+        return error
+    rows = comment_service.list_threads(post_id, limit + 1, after)
+    return HttpResponse.json(page_payload(rows, limit))
+
+
+def list_replies(request: HttpRequest) -> HttpResponse:
+    post_id = int(request.path_params.get("post_id"))
+    comment_id = int(request.path_params.get("comment_id"))
+    limit, after, error = read_page(request)
+    if error:
+        return error
+    rows = comment_service.list_replies(post_id, comment_id, limit + 1, after)
+    payload = page_payload(rows, limit)
+    # 游标按平铺顺序计算，组装成树只影响返回结构
+    payload["items"] = comment_service.build_tree(payload["items"])
+    return HttpResponse.json(payload)
 
 
 def add_comment(request: HttpRequest) -> HttpResponse:
@@ -25,5 +41,11 @@ def add_comment(request: HttpRequest) -> HttpResponse:
         return HttpResponse.json({"error": "评论内容不能为空"}, status=400)
     post_id = int(request.path_params.get("post_id"))
     parent_id = payload.get("parent_id") if payload else None
+    try:
+        parent_id = int(parent_id) if parent_id else None
+    except (TypeError, ValueError):
+        return HttpResponse.json({"error": "parent_id 不合法"}, status=400)
     comment_id = comment_service.add_comment(post_id, user["id"], body, parent_id)
+    if comment_id is None:
+        return HttpResponse.json({"error": "文章或被回复的评论不存在"}, status=404)
     return HttpResponse.json({"comment_id": comment_id}, status=201)
@@ -4,7 +4,7 @@ from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 from services import message_service
 
-from .utils import require_login
+from .utils import page_payload, read_page, require_login
 
 
 def send_message(request: HttpRequest) -> HttpResponse:
@@ -27,11 +27,19 @@ def inbox(request: HttpRequest) -> HttpResponse:
     user, error = require_login(request)
     if error:
         return error
-    return HttpResponse.json({"items": message_service.inbox(user["id"])})
+    limit, before, error = read_page(request)
+    if error:
+        return error
+    rows = message_service.inbox(user["id"], limit + 1, before)
+    return HttpResponse.json(page_payload(rows, limit))
 
 
 def outbox(request: HttpRequest) -> HttpResponse:
     user, error = require_login(request)
     if error:
         return error
-    return HttpResponse.json({"items": message_service.outbox(user["id"])})
+    limit, before, error = read_page(request)
+    if error:
+        return error
+    rows = message_service.outbox(user["id"], limit + 1, before)
+    return HttpResponse.json(page_payload(rows, limit))
@@ -9,7 +9,7 @@ from server.metrics import metrics_collector
 
 def dashboard(request: HttpRequest) -> HttpResponse:
     user = get_current_user(request)
-    metrics = metrics_collector.snapshot()
+    metrics = metrics_collector.cluster_snapshot()
     html = render(
         "monitor.html",
         {
@@ -22,5 +22,5 @@ def dashboard(request: HttpRequest) -> HttpResponse:
 
 
 def network_metrics(request: HttpRequest) -> HttpResponse:
-    metrics = metrics_collector.snapshot()
+    metrics = metrics_collector.cluster_snapshot()
     return HttpResponse.json({"metrics": metrics})
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 from controllers.auth_controller import get_current_user
+from repository.db import PoolTimeout
 from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 from server.session import session_store
-from server.template_renderer import render
+from server.template_renderer import render, render_stream
 from services import comment_service, post_service
 
+from .utils import page_payload
 
-def _render(template: str, context: dict, status: int = 200) -> HttpResponse:
+COMMENT_PAGE_SIZE = 20
+
+
+def _render(template: str, context: dict, status: int = 200, stream: bool = False) -> HttpResponse:
+    if stream:
+        # 大页面边渲染边发送，降低首字节时间与峰值内存
+        return HttpResponse.stream(render_stream(template, context), status=status)
     html = render(template, context)
     return HttpResponse.text(html, status=status)
 
@@ -18,6 +26,7 @@ def home(request: HttpRequest) -> HttpResponse:
     keyword = request.query.get("q")
     tag = request.query.get("tag")
     posts = post_service.search_posts(keyword, tag, limit=20)
+    post_service.attach_user_flags(posts, user["id"] if user else None)
     categories = post_service.list_categories(limit=10)
     stats = post_service.get_post_stats()
     latest_post = posts[0] if posts else None
@@ -33,6 +42,7 @@ def home(request: HttpRequest) -> HttpResponse:
             "post_stats": stats,
             "latest_post": latest_post,
         },
+        stream=True,
     )
 
 
@@ -54,13 +64,15 @@ def post_detail(request: HttpRequest) -> HttpResponse:
     post = post_service.get_post(post_id, user["id"] if user else None)
     if not post:
         return HttpResponse.text("文章不存在", status=404)
-    comments = comment_service.list_comments(post_id)
+    # 首屏只渲染第一页顶层评论，后续楼层与回复由页面按游标加载
+    threads = page_payload(comment_service.list_threads(post_id, COMMENT_PAGE_SIZE + 1), COMMENT_PAGE_SIZE)
     return _render(
         "post_detail.html",
         {
             "title": post["title"],
             "post": post,
-            "comments": comments,
+            "comments": threads["items"],
+            "next_cursor": threads["next_cursor"],
             "user": user,
         },
     )
@@ -73,6 +85,8 @@ def profile_page(request: HttpRequest) -> HttpResponse:
     posts = post_service.list_by_author(user["id"], limit=50)
     liked_posts = post_service.list_reacted_posts(user["id"], "like", limit=30)
     favorite_posts = post_service.list_reacted_posts(user["id"], "favorite", limit=30)
+    # 三个列表合并成一次查询
+    post_service.attach_user_flags(posts + liked_posts + favorite_posts, user["id"])
     return _render(
         "profile.html",
         {
@@ -82,6 +96,7 @@ def profile_page(request: HttpRequest) -> HttpResponse:
             "liked_posts": liked_posts,
             "favorite_posts": favorite_posts,
         },
+        stream=True,
     )
 
 
@@ -96,6 +111,7 @@ def search_page(request: HttpRequest) -> HttpResponse:
         if has_query
         else []
     )
+    post_service.attach_user_flags(results, user["id"] if user else None)
     return _render(
         "search.html",
         {
@@ -109,6 +125,7 @@ def search_page(request: HttpRequest) -> HttpResponse:
             "has_query": has_query,
             "search_keyword": keyword,
         },
+        stream=True,
     )
 
 
@@ -152,6 +169,9 @@ def submit_post_page(request: HttpRequest) -> HttpResponse:
         )
     try:
         post_id = post_service.create_post(user["id"], title, body, tags or None)
+    except PoolTimeout:
+        # 交给 process_request 统一返回 503
+        raise
     except Exception as exc:
         return _render(
             "new_post.html",
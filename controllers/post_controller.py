@@ -5,23 +5,30 @@ from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 from services import post_service
 
-from .utils import require_login
+from .utils import page_payload, read_page, require_login
 
 
 def list_posts(request: HttpRequest) -> HttpResponse:
-    limit = int(request.query.get("limit", "20"))
-    offset = int(request.query.get("offset", "0"))
-    data = post_service.list_posts(limit, offset)
-    return HttpResponse.json({"items": data})
+    limit, before, error = read_page(request)
+    if error:
+        return error
+    user = get_current_user(request)
+    rows = post_service.list_posts(limit + 1, before)
+    post_service.attach_user_flags(rows, user["id"] if user else None)
+    return HttpResponse.json(page_payload(rows, limit))
 
 
 def search_posts(request: HttpRequest) -> HttpResponse:
-    limit = int(request.query.get("limit", "20"))
-    offset = int(request.query.get("offset", "0"))
     keyword = request.query.get("q")
     tag = request.query.get("tag")
-    data = post_service.search_posts(keyword, tag, limit, offset)
-    return HttpResponse.json({"items": data, "filters": {"q": keyword, "tag": tag}})
+    sort_key = post_service.search_sort_key(keyword)
+    limit, before, error = read_page(request, sort_key=sort_key)
+    if error:
+        return error
+    user = get_current_user(request)
+    rows = post_service.search_posts(keyword, tag, limit + 1, before, sort_key=sort_key)
+    post_service.attach_user_flags(rows, user["id"] if user else None)
+    return HttpResponse.json(page_payload(rows, limit, sort_key=sort_key, filters={"q": keyword, "tag": tag}))
 
 
 def create_post(request: HttpRequest) -> HttpResponse:
@@ -76,5 +83,8 @@ def feed(request: HttpRequest) -> HttpResponse:
     user, error = require_login(request)
     if error:
         return error
-    items = post_service.feed_for_user(user["id"], limit=20)
-    return HttpResponse.json({"items": items})
+    limit, before, error = read_page(request)
+    if error:
+        return error
+    rows = post_service.attach_user_flags(post_service.feed_for_user(user["id"], limit + 1, before), user["id"])
+    return HttpResponse.json(page_payload(rows, limit))
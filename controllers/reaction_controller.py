@@ -17,4 +17,6 @@ def toggle_reaction(request: HttpRequest) -> HttpResponse:
         return HttpResponse.json({"error": "reaction 取值必须是 like 或 favorite"}, status=400)
     post_id = int(request.path_params.get("post_id"))
     stats = reaction_service.toggle(post_id, user["id"], reaction)
+    if stats is None:
+        return HttpResponse.json({"error": "文章不存在"}, status=404)
     return HttpResponse.json({"stats": stats})
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from server.http_request import HttpRequest
 from server.http_response import HttpResponse
-from services import subscription_service
+from services import post_service, subscription_service
 
-from .utils import require_login
+from .utils import page_payload, read_page, require_login
 
 
 def follow_author(request: HttpRequest) -> HttpResponse:
@@ -29,5 +29,8 @@ def feed(request: HttpRequest) -> HttpResponse:
     user, error = require_login(request)
     if error:
         return error
-    items = subscription_service.feed(user["id"], limit=20)
-    return HttpResponse.json({"items": items})
+    limit, before, error = read_page(request)
+    if error:
+        return error
+    rows = post_service.attach_user_flags(subscription_service.feed(user["id"], limit + 1, before), user["id"])
+    return HttpResponse.json(page_payload(rows, limit))
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from server.http_request import HttpRequest
 from server.http_response import HttpResponse
 
 from .auth_controller import get_current_user
 
+MAX_PAGE_SIZE = 100
+
 
 def require_login(request: HttpRequest) -> Tuple[Optional[dict], Optional[HttpResponse]]:
     """若未登录则直接返回 401"""
@@ -15,3 +19,51 @@ def require_login(request: HttpRequest) -> Tuple[Optional[dict], Optional[HttpRe
     if not user:
         return None, HttpResponse.json({"error": "需要先登录"}, status=401)
     return user, None
+
+
+def read_page(
+    request: HttpRequest, default_limit: int = 20, sort_key: str = "created_at"
+) -> Tuple[int, Optional[tuple], Optional[HttpResponse]]:
+    """读取 limit 与不透明的 cursor 参数，格式错误时返回 400
+
+    sort_key 为结果的排序字段：created_at 对应时间倒序列表，score 对应全文检索的相关度排序。
+    """
+
+    try:
+        limit = min(max(int(request.query.get("limit", default_limit)), 1), MAX_PAGE_SIZE)
+        token = request.query.get("cursor")
+        before = _decode_cursor(token, sort_key) if token else None
+    except ValueError:
+        return 0, None, HttpResponse.json({"error": "分页参数不合法"}, status=400)
+    return limit, before, None
+
+
+def page_payload(rows: List[dict], limit: int, sort_key: str = "created_at", **extra) -> dict:
+    """rows 需按 limit + 1 查询，多出的一行说明还有下一页"""
+
+    items = rows[:limit]
+    next_cursor = _encode_cursor(items[-1], sort_key) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor, **extra}
+
+
+def _encode_cursor(row: dict, sort_key: str) -> str:
+    value = row[sort_key]
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    raw = f"{sort_key}|{value!s}|{row['id']}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str, sort_key: str) -> tuple:
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        key, value, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("cursor 不合法") from None
+    if key != sort_key:
+        # 例如翻页途中把筛选条件从关键词改成了标签
+        raise ValueError("cursor 与当前排序方式不匹配")
+    if sort_key == "score":
+        return float(value), int(row_id)
+    datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value, int(row_id)
@@ -0,0 +1,12 @@
+-- 为键集分页补充 (…, created_at, id) 复合索引，新建库的 schema.sql 已包含这些索引
+USE tcp_blog;
+
+ALTER TABLE posts
+    DROP INDEX idx_posts_author_created,
+    ADD INDEX idx_posts_author_created (author_id, created_at, id),
+    ADD INDEX idx_posts_created (created_at, id),
+    ADD INDEX idx_posts_tags_created (tags, created_at, id);
+
+ALTER TABLE messages
+    ADD INDEX idx_messages_receiver_created (receiver_id, created_at, id),
+    ADD INDEX idx_messages_sender_created (sender_id, created_at, id);
@@ -0,0 +1,4 @@
+-- 搜索索引按 updated_at 增量同步所需的索引
+USE tcp_blog;
+
+ALTER TABLE posts ADD INDEX idx_posts_updated (updated_at);
@@ -0,0 +1,23 @@
+-- 多标签模型：新建 tags / post_tags 表，随后运行 tools/migrate_post_tags.py 拆分已有的 posts.tags 并计算计数
+USE tcp_blog;
+
+CREATE TABLE IF NOT EXISTS tags (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    name VARCHAR(64) NOT NULL,
+    post_count INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uniq_tag_name (name),
+    INDEX idx_tags_post_count (post_count, id)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS post_tags (
+    post_id BIGINT NOT NULL,
+    tag_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (post_id, tag_id),
+    INDEX idx_post_tags_tag_created (tag_id, created_at, post_id),
+    CONSTRAINT fk_post_tag_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
+    CONSTRAINT fk_post_tag_tag FOREIGN KEY (tag_id) REFERENCES tags(id)
+) ENGINE=InnoDB;
+
+-- 标签筛选改走 post_tags，旧的 posts.tags 索引不再使用
+ALTER TABLE posts DROP INDEX idx_posts_tags_created;
@@ -0,0 +1,20 @@
+-- 关注流时间线：新建 timelines 表并为 users 增加粉丝计数，随后运行 tools/rebuild_timelines.py 回填
+USE tcp_blog;
+
+ALTER TABLE users
+    ADD COLUMN follower_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN fanout_on_read TINYINT(1) NOT NULL DEFAULT 0,
+    ADD INDEX idx_users_fanout_on_read (fanout_on_read);
+
+CREATE TABLE IF NOT EXISTS timelines (
+    user_id BIGINT NOT NULL,
+    post_id BIGINT NOT NULL,
+    author_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, post_id),
+    INDEX idx_timelines_user_created (user_id, created_at, post_id),
+    INDEX idx_timelines_user_author (user_id, author_id),
+    INDEX idx_timelines_post (post_id),
+    CONSTRAINT fk_timeline_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
+    CONSTRAINT fk_timeline_user FOREIGN KEY (user_id) REFERENCES users(id)
+) ENGINE=InnoDB;
@@ -0,0 +1,11 @@
+-- 评论楼层与计数：新增 root_id / reply_count / comment_count，随后运行 tools/rebuild_comment_threads.py 回填
+USE tcp_blog;
+
+ALTER TABLE posts ADD COLUMN comment_count INT NOT NULL DEFAULT 0;
+
+ALTER TABLE comments
+    ADD COLUMN root_id BIGINT NULL AFTER parent_id,
+    ADD COLUMN reply_count INT NOT NULL DEFAULT 0 AFTER root_id,
+    DROP INDEX idx_comments_post_created,
+    ADD INDEX idx_comments_post_root_created (post_id, root_id, created_at, id),
+    ADD INDEX idx_comments_root_created (root_id, created_at, id);
@@ -0,0 +1,6 @@
+-- 点赞/收藏冗余计数：新增 like_count / favorite_count，随后运行 tools/repair_reaction_counts.py 回填
+USE tcp_blog;
+
+ALTER TABLE posts
+    ADD COLUMN like_count INT NOT NULL DEFAULT 0 AFTER is_public,
+    ADD COLUMN favorite_count INT NOT NULL DEFAULT 0 AFTER like_count;
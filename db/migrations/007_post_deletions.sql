@@ -0,0 +1,8 @@
+-- 搜索索引按 deleted_at 增量同步删除，不再定期全表扫描文章 id
+USE tcp_blog;
+
+CREATE TABLE IF NOT EXISTS post_deletions (
+    post_id BIGINT PRIMARY KEY,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_post_deletions_deleted (deleted_at)
+) ENGINE=InnoDB;
@@ -9,7 +9,11 @@ CREATE TABLE IF NOT EXISTS users (
     nickname VARCHAR(64) NOT NULL,
     email VARCHAR(128) NULL,
     bio TEXT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    -- 由关注/取消关注增量维护；超过 BLOG_TIMELINE_FANOUT_LIMIT 后 fanout_on_read 置位，文章不再推入时间线
+    follower_count INT NOT NULL DEFAULT 0,
+    fanout_on_read TINYINT(1) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_users_fanout_on_read (fanout_on_read)
 ) ENGINE=InnoDB;
 
 CREATE TABLE IF NOT EXISTS posts (
@@ -17,22 +21,61 @@ CREATE TABLE IF NOT EXISTS posts (
     author_id BIGINT NOT NULL,
     title VARCHAR(200) NOT NULL,
     body MEDIUMTEXT NOT NULL,
+    -- 标签的展示串（逗号分隔），筛选与计数以 tags / post_tags 表为准
     tags VARCHAR(256) NULL,
     is_public TINYINT(1) DEFAULT 1,
+    -- 由 reaction_repo.toggle_reaction 增量维护，可用 tools/repair_reaction_counts.py 按 reactions 表重算
+    like_count INT NOT NULL DEFAULT 0,
+    favorite_count INT NOT NULL DEFAULT 0,
+    -- 由 comment_repo.create_comment 增量维护，可用 tools/rebuild_comment_threads.py 重算
+    comment_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_posts_author_created (author_id, created_at),
+    INDEX idx_posts_author_created (author_id, created_at, id),
+    INDEX idx_posts_created (created_at, id),
+    INDEX idx_posts_updated (updated_at),
     CONSTRAINT fk_post_author FOREIGN KEY (author_id) REFERENCES users(id)
 ) ENGINE=InnoDB;
 
+-- 已删除文章的记录，供各进程的搜索索引按 deleted_at 增量同步，超过保留期后清理
+CREATE TABLE IF NOT EXISTS post_deletions (
+    post_id BIGINT PRIMARY KEY,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_post_deletions_deleted (deleted_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS tags (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    name VARCHAR(64) NOT NULL,
+    -- 由 tag_repo.set_post_tags 增量维护，可用 tools/migrate_post_tags.py 重算
+    post_count INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uniq_tag_name (name),
+    INDEX idx_tags_post_count (post_count, id)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS post_tags (
+    post_id BIGINT NOT NULL,
+    tag_id BIGINT NOT NULL,
+    -- 冗余自 posts.created_at，按标签分页无需回表排序
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (post_id, tag_id),
+    INDEX idx_post_tags_tag_created (tag_id, created_at, post_id),
+    CONSTRAINT fk_post_tag_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
+    CONSTRAINT fk_post_tag_tag FOREIGN KEY (tag_id) REFERENCES tags(id)
+) ENGINE=InnoDB;
+
 CREATE TABLE IF NOT EXISTS comments (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     post_id BIGINT NOT NULL,
     user_id BIGINT NOT NULL,
     parent_id BIGINT NULL,
+    -- 所在楼层的顶层评论，顶层评论为 NULL；reply_count 只在顶层评论上维护，为楼层内的回复总数
+    root_id BIGINT NULL,
+    reply_count INT NOT NULL DEFAULT 0,
     body TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_comments_post_created (post_id, created_at),
+    INDEX idx_comments_post_root_created (post_id, root_id, created_at, id),
+    INDEX idx_comments_root_created (root_id, created_at, id),
     CONSTRAINT fk_comment_post FOREIGN KEY (post_id) REFERENCES posts(id),
     CONSTRAINT fk_comment_user FOREIGN KEY (user_id) REFERENCES users(id)
 ) ENGINE=InnoDB;
@@ -58,6 +101,21 @@ CREATE TABLE IF NOT EXISTS subscriptions (
     CONSTRAINT fk_subscription_author FOREIGN KEY (author_id) REFERENCES users(id)
 ) ENGINE=InnoDB;
 
+-- 关注流时间线：发文时推给关注者，created_at 冗余自 posts，按用户读取为一次索引范围扫描
+CREATE TABLE IF NOT EXISTS timelines (
+    user_id BIGINT NOT NULL,
+    post_id BIGINT NOT NULL,
+    author_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, post_id),
+    INDEX idx_timelines_user_created (user_id, created_at, post_id),
+    INDEX idx_timelines_user_author (user_id, author_id),
+    INDEX idx_timelines_post (post_id),
+    -- 删除文章时级联清理所有时间线中的条目
+    CONSTRAINT fk_timeline_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
+    CONSTRAINT fk_timeline_user FOREIGN KEY (user_id) REFERENCES users(id)
+) ENGINE=InnoDB;
+
 CREATE TABLE IF NOT EXISTS messages (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     sender_id BIGINT NOT NULL,
@@ -66,6 +124,8 @@ CREATE TABLE IF NOT EXISTS messages (
     body TEXT NOT NULL,
     is_read TINYINT(1) DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_messages_receiver_created (receiver_id, created_at, id),
+    INDEX idx_messages_sender_created (sender_id, created_at, id),
     CONSTRAINT fk_message_sender FOREIGN KEY (sender_id) REFERENCES users(id),
     CONSTRAINT fk_message_receiver FOREIGN KEY (receiver_id) REFERENCES users(id)
 ) ENGINE=InnoDB;
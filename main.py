@@ -1,4 +1,5 @@
 import logging
+import threading
 
 import config
 from controllers import (
@@ -11,25 +12,37 @@ from controllers import (
     reaction_controller,
     subscription_controller,
 )
+from repository.db import get_pool, request_session
+from server.assets import asset_manifest
+from server.async_http_server import AsyncHttpServer
+from server.page_cache import page_cache
+from server.prefork import PreforkSupervisor
 from server.router import Router
 from server.tcp_http_server import TcpHttpServer
+from services import events
+from services.search_index import search_index
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
 
 def build_router() -> Router:
     router = Router()
+    # 请求级数据库会话：承载事务与 Loader 缓存，连接只在语句或事务期间占用
+    router.add_scope(request_session)
+    # 文章、评论与计数变化后清空页面缓存
+    events.on_content_changed(page_cache.invalidate)
 
     # 页面与静态展示
-    router.add_route("GET", "/", page_controller.home)
+    router.add_route("GET", "/", page_cache.cached(page_controller.home))
     router.add_route("GET", "/login", page_controller.login_page)
     router.add_route("GET", "/register", page_controller.register_page)
     router.add_route("GET", "/logout", page_controller.logout_page)
     router.add_route("GET", "/posts/new", page_controller.new_post_page)
     router.add_route("POST", "/posts/new", page_controller.submit_post_page)
-    router.add_route("GET", "/posts/{post_id}", page_controller.post_detail)
+    router.add_route("GET", "/posts/{post_id:int}", page_cache.cached(page_controller.post_detail))
     router.add_route("GET", "/profile", page_controller.profile_page)
-    router.add_route("GET", "/search", page_controller.search_page)
+    router.add_route("GET", "/search", page_cache.cached(page_controller.search_page))
     router.add_route("GET", "/monitor", monitor_controller.dashboard)
 
     # 登录注册与会话
@@ -42,21 +55,24 @@ def build_router() -> Router:
     router.add_route("GET", "/api/posts", post_controller.list_posts)
     router.add_route("GET", "/api/posts/search", post_controller.search_posts)
     router.add_route("POST", "/api/posts", post_controller.create_post)
-    router.add_route("GET", "/api/posts/{post_id}", post_controller.get_post)
-    router.add_route("POST", "/api/posts/{post_id}/edit", post_controller.update_post)
-    router.add_route("POST", "/api/posts/{post_id}/delete", post_controller.delete_post)
+    router.add_route("GET", "/api/posts/{post_id:int}", post_controller.get_post)
+    router.add_route("POST", "/api/posts/{post_id:int}/edit", post_controller.update_post)
+    router.add_route("POST", "/api/posts/{post_id:int}/delete", post_controller.delete_post)
     router.add_route("GET", "/api/feed", post_controller.feed)
 
     # 评论
-    router.add_route("GET", "/api/posts/{post_id}/comments", comment_controller.list_comments)
-    router.add_route("POST", "/api/posts/{post_id}/comments", comment_controller.add_comment)
+    router.add_route("GET", "/api/posts/{post_id:int}/comments", comment_controller.list_comments)
+    router.add_route("POST", "/api/posts/{post_id:int}/comments", comment_controller.add_comment)
+    router.add_route(
+        "GET", "/api/posts/{post_id:int}/comments/{comment_id:int}/replies", comment_controller.list_replies
+    )
 
     # 点赞收藏
-    router.add_route("POST", "/api/posts/{post_id}/reaction", reaction_controller.toggle_reaction)
+    router.add_route("POST", "/api/posts/{post_id:int}/reaction", reaction_controller.toggle_reaction)
 
     # 关注推送
-    router.add_route("POST", "/api/authors/{author_id}/follow", subscription_controller.follow_author)
-    router.add_route("POST", "/api/authors/{author_id}/unfollow", subscription_controller.unfollow_author)
+    router.add_route("POST", "/api/authors/{author_id:int}/follow", subscription_controller.follow_author)
+    router.add_route("POST", "/api/authors/{author_id:int}/unfollow", subscription_controller.unfollow_author)
     router.add_route("GET", "/api/subscriptions/feed", subscription_controller.feed)
 
     # 私信
@@ -68,10 +84,33 @@ def build_router() -> Router:
     return router
 
 
-def main() -> None:
+def _warm_up() -> None:
+    """工作进程启动后在后台预热，数据库暂不可用时只记录日志，由首个请求按需重试"""
+
+    try:
+        get_pool().prefill()
+    except Exception as exc:
+        logger.warning("数据库连接池预热失败: %s", exc)
+
+
+def build_server(reuse_port: bool = False):
     router = build_router()
-    server = TcpHttpServer(config.HOST, config.PORT, router)
-    server.start()
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    if config.SEARCH_ENGINE_ENABLED:
+        # 每个工作进程各自维护索引，预热完成前关键词检索走数据库
+        search_index.start()
+    if config.SERVER_ENGINE == "asyncio":
+        return AsyncHttpServer(config.HOST, config.PORT, router, reuse_port=reuse_port)
+    return TcpHttpServer(config.HOST, config.PORT, router, reuse_port=reuse_port)
+
+
+def main() -> None:
+    # 在派生工作进程前生成资源清单，子进程直接继承
+    asset_manifest.build()
+    if config.PREFORK_WORKERS > 0:
+        PreforkSupervisor(lambda: build_server(reuse_port=True), config.PREFORK_WORKERS).start()
+    else:
+        build_server().start()
 
 
 if __name__ == "__main__":
@@ -1,25 +1,68 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from .db import get_cursor
+from .db import get_cursor, transaction
+from .pagination import Keyset, keyset_condition
 
 
-def create_comment(post_id: int, user_id: int, body: str, parent_id: int | None) -> int:
+def create_comment(post_id: int, user_id: int, body: str, parent_id: int | None) -> Optional[int]:
+    """发表评论或回复，同一事务内增加文章评论数与所在楼层的回复数；文章或被回复的评论不存在时返回 None"""
+
+    with transaction(), get_cursor() as cursor:
+        root_id = None
+        if parent_id:
+            cursor.execute("SELECT post_id, root_id FROM comments WHERE id=%s", (parent_id,))
+            parent = cursor.fetchone()
+            if parent is None or parent["post_id"] != post_id:
+                return None
+            # 回复统一挂在顶层评论所在的楼层下，便于按楼层分页
+            root_id = parent["root_id"] or parent_id
+        if not cursor.execute(
+            "UPDATE posts SET comment_count = comment_count + 1, updated_at = updated_at WHERE id=%s", (post_id,)
+        ):
+            return None
+        cursor.execute(
+            "INSERT INTO comments (post_id, user_id, body, parent_id, root_id) VALUES (%s, %s, %s, %s, %s)",
+            (post_id, user_id, body, parent_id or None, root_id),
+        )
+        comment_id = cursor.lastrowid
+        if root_id:
+            cursor.execute("UPDATE comments SET reply_count = reply_count + 1 WHERE id=%s", (root_id,))
+        return comment_id
+
+
+def list_threads(post_id: int, limit: int = 20, after: Optional[Keyset] = None) -> List[Dict]:
+    """按时间正序列出文章的顶层评论，沿 (post_id, root_id, created_at, id) 索引分页"""
+
+    condition, params = keyset_condition("comments", after, descending=False)
+    keyset_sql = f"AND {condition}" if condition else ""
     with get_cursor() as cursor:
-        sql = "INSERT INTO comments (post_id, user_id, body, parent_id) VALUES (%s, %s, %s, %s)"
-        cursor.execute(sql, (post_id, user_id, body, parent_id))
-        return cursor.lastrowid
+        cursor.execute(
+            f"""
+            SELECT comments.*, users.nickname AS author_name
+            FROM comments JOIN users ON comments.user_id = users.id
+            WHERE comments.post_id=%s AND comments.root_id IS NULL {keyset_sql}
+            ORDER BY comments.created_at, comments.id LIMIT %s
+            """,
+            (post_id, *params, limit),
+        )
+        return cursor.fetchall()
+
 
+def list_replies(post_id: int, root_id: int, limit: int = 20, after: Optional[Keyset] = None) -> List[Dict]:
+    """按时间正序列出一个楼层内的全部回复（含多级回复），沿 (root_id, created_at, id) 索引分页"""
 
-def list_by_post(post_id: int) -> List[Dict]:
+    condition, params = keyset_condition("comments", after, descending=False)
+    keyset_sql = f"AND {condition}" if condition else ""
     with get_cursor() as cursor:
         cursor.execute(
-            """
+            f"""
             SELECT comments.*, users.nickname AS author_name
             FROM comments JOIN users ON comments.user_id = users.id
-            WHERE comments.post_id=%s ORDER BY comments.created_at ASC
+            WHERE comments.root_id=%s AND comments.post_id=%s {keyset_sql}
+            ORDER BY comments.created_at, comments.id LIMIT %s
             """,
-            (post_id,),
+            (root_id, post_id, *params, limit),
         )
         return cursor.fetchall()
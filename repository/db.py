@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import collections
 import contextlib
-from typing import Generator
+import contextvars
+import os
+import threading
+import time
+from typing import Callable, Deque, Dict, Generator, Optional
 
 import pymysql
 
 import config
+from server.metrics import metrics_collector
 
 
 def get_connection():
@@ -23,14 +29,279 @@ def get_connection():
     )
 
 
+class PoolTimeout(Exception):
+    """等待空闲连接超过 checkout 超时"""
+
+
+class PooledConnection:
+    """连接池中的连接及其创建、最近使用时间"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn, now: float) -> None:
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """线程安全的连接池：空闲连接后进先出复用，超过寿命或空闲过久的连接被关闭"""
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        min_size: int,
+        max_size: int,
+        max_lifetime: float,
+        idle_timeout: float,
+        checkout_timeout: float,
+        ping_after: float,
+    ) -> None:
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(1, max_size)
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self.pid = os.getpid()
+        # 右端为最近归还的连接，左端为空闲最久的连接
+        self._idle: Deque[PooledConnection] = collections.deque()
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> PooledConnection:
+        """借出连接；池满时最多等待 checkout_timeout 秒"""
+
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._evict_locked(now)
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    metrics_collector.incr("db_pool_timeouts")
+                    raise PoolTimeout("数据库连接池已耗尽")
+                self._cond.wait(remaining)
+        metrics_collector.incr("db_pool_checkouts")
+        metrics_collector.observe("db_pool_wait_ms", (time.monotonic() - start) * 1000)
+        if pooled is None:
+            return self._connect()
+        if time.monotonic() - pooled.last_used > self.ping_after:
+            # 闲置过的连接可能已被 MySQL 的 wait_timeout 断开，借出前检查并按需重连
+            try:
+                pooled.conn.ping(reconnect=True)
+            except pymysql.MySQLError:
+                self._discard(pooled)
+                with self._cond:
+                    self._size += 1
+                return self._connect()
+        return pooled
+
+    def release(self, pooled: PooledConnection, broken: bool = False) -> None:
+        now = time.monotonic()
+        if broken or now - pooled.created_at > self.max_lifetime:
+            self._discard(pooled)
+            return
+        pooled.last_used = now
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def prefill(self) -> None:
+        """预先建立 min_size 个连接放入空闲队列，首批请求不必等待建连"""
+
+        while True:
+            with self._cond:
+                if self._size >= min(self.min_size, self.max_size):
+                    return
+                self._size += 1
+            self.release(self._connect())
+
+    def size(self) -> int:
+        return self._size
+
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _connect(self) -> PooledConnection:
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        metrics_collector.incr("db_pool_connects")
+        return PooledConnection(conn, time.monotonic())
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        with contextlib.suppress(Exception):
+            pooled.conn.close()
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _evict_locked(self, now: float) -> None:
+        """关闭超过寿命的空闲连接，以及超出 min_size 部分中空闲过久的连接"""
+
+        kept: Deque[PooledConnection] = collections.deque()
+        while self._idle:
+            pooled = self._idle.popleft()
+            expired = now - pooled.created_at > self.max_lifetime
+            stale = now - pooled.last_used > self.idle_timeout and self._size > self.min_size
+            if expired or stale:
+                self._size -= 1
+                with contextlib.suppress(Exception):
+                    pooled.conn.close()
+            else:
+                kept.append(pooled)
+        self._idle = kept
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """按进程延迟创建连接池，prefork 子进程不会复用父进程的套接字"""
+
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(
+                get_connection,
+                min_size=config.DB_POOL_MIN_SIZE,
+                max_size=config.DB_POOL_MAX_SIZE,
+                max_lifetime=config.DB_POOL_MAX_LIFETIME,
+                idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+                checkout_timeout=config.DB_POOL_CHECKOUT_TIMEOUT,
+                ping_after=config.DB_POOL_PING_AFTER,
+            )
+            metrics_collector.register_gauge("db_pool_size", _pool.size)
+            metrics_collector.register_gauge("db_pool_idle", _pool.idle)
+        return _pool
+
+
+class DbSession:
+    """请求级数据库会话：事务之外每条语句执行完即归还连接，事务期间独占一个连接；memo 为 Loader 的请求级缓存"""
+
+    __slots__ = ("pool", "pooled", "depth", "memo")
+
+    def __init__(self, pool: ConnectionPool) -> None:
+        self.pool = pool
+        self.pooled: Optional[PooledConnection] = None
+        self.depth = 0
+        self.memo: Dict[str, dict] = {}
+
+    def connection(self):
+        if self.pooled is None:
+            self.pooled = self.pool.acquire()
+        return self.pooled.conn
+
+    def discard(self) -> None:
+        """连接层出错时丢弃当前连接，同一请求的后续查询会借用新连接"""
+
+        if self.pooled is not None:
+            self.pool.release(self.pooled, broken=True)
+            self.pooled = None
+
+    def close(self) -> None:
+        if self.pooled is not None:
+            self.pool.release(self.pooled)
+            self.pooled = None
+
+
+_current_session: contextvars.ContextVar[Optional[DbSession]] = contextvars.ContextVar("db_session", default=None)
+
+
+def current_session() -> Optional[DbSession]:
+    return _current_session.get()
+
+
+@contextlib.contextmanager
+def request_session() -> Generator[DbSession, None, None]:
+    """请求级工作单元：作用域内的事务与 Loader 缓存挂在同一个会话上，退出时归还仍持有的连接"""
+
+    session = DbSession(get_pool())
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        session.close()
+
+
+@contextlib.contextmanager
+def transaction() -> Generator[None, None, None]:
+    """事务边界，正常退出时提交、异常时回滚；嵌套调用并入最外层事务"""
+
+    session = _current_session.get()
+    if session is not None and session.depth:
+        session.depth += 1
+        try:
+            yield
+        finally:
+            session.depth -= 1
+        return
+    with contextlib.ExitStack() as stack:
+        if session is None:
+            session = stack.enter_context(request_session())
+        conn = session.connection()
+        session.depth = 1
+        try:
+            conn.begin()
+            yield
+        except BaseException:
+            with contextlib.suppress(pymysql.MySQLError):
+                conn.rollback()
+            raise
+        else:
+            try:
+                conn.commit()
+            except (pymysql.OperationalError, pymysql.InterfaceError):
+                session.discard()
+                raise
+        finally:
+            session.depth = 0
+            # 事务结束即归还连接，请求余下的 bcrypt、模板渲染等不占用连接池
+            session.close()
+
+
 @contextlib.contextmanager
 def get_cursor() -> Generator[pymysql.cursors.Cursor, None, None]:
-    """上下文管理游标"""
+    """上下文管理游标；事务内复用事务连接，否则为本条语句从连接池借出、用完即归还"""
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    session = _current_session.get()
+    owned = session is None
+    if owned:
+        session = DbSession(get_pool())
+    cursor = None
+    broken = False
     try:
+        # 借出连接或创建游标失败时也要走 finally，避免本次借出的连接占着池中名额
+        cursor = session.connection().cursor()
         yield cursor
+    except (pymysql.OperationalError, pymysql.InterfaceError):
+        # 连接层错误后状态未知，直接丢弃而不是放回池中
+        broken = True
+        raise
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None:
+            with contextlib.suppress(pymysql.MySQLError):
+                cursor.close()
+        if broken:
+            session.discard()
+        elif owned or not session.depth:
+            session.close()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from .db import current_session
+
+_MISSING = object()
+
+
+class Loader:
+    """按 id 批量加载实体，并在当前请求内记忆结果
+
+    load_many 把所有未命中的 id 合并为一次 batch_fn 调用；请求作用域之外（后台线程、命令行工具）不做记忆。
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Hashable]], Dict[Hashable, Dict]]) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+
+    def _memo(self) -> Optional[dict]:
+        session = current_session()
+        if session is None:
+            return None
+        return session.memo.setdefault(self.name, {})
+
+    def load(self, key: Hashable) -> Optional[Dict]:
+        return self.load_many([key]).get(key)
+
+    def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[Dict]]:
+        """返回 {id: 实体或 None}，不存在的 id 也会被记忆为 None"""
+
+        keys = list(dict.fromkeys(keys))
+        memo = self._memo()
+        if memo is None:
+            found = self.batch_fn(keys) if keys else {}
+            return {key: found.get(key) for key in keys}
+        missing = [key for key in keys if memo.get(key, _MISSING) is _MISSING]
+        if missing:
+            found = self.batch_fn(missing)
+            for key in missing:
+                memo[key] = found.get(key)
+        return {key: memo[key] for key in keys}
+
+    def prime(self, key: Hashable, value: Dict) -> None:
+        """把列表查询已取到的行放入请求缓存（post_service 的列表与检索调用），已缓存的 id 保持不变"""
+
+        memo = self._memo()
+        if memo is not None:
+            memo.setdefault(key, value)
+
+    def clear(self, key: Hashable) -> None:
+        """写操作之后丢弃该 id 的请求缓存"""
+
+        memo = self._memo()
+        if memo is not None:
+            memo.pop(key, None)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from .db import get_cursor
+from .pagination import Keyset, keyset_condition
 
 
 def send_message(sender_id: int, receiver_id: int, subject: str, body: str) -> int:
@@ -14,27 +15,33 @@ def send_message(sender_id: int, receiver_id: int, subject: str, body: str) -> i
         return cursor.lastrowid
 
 
-def list_inbox(user_id: int) -> List[Dict]:
+def list_inbox(user_id: int, limit: int = 20, before: Optional[Keyset] = None) -> List[Dict]:
+    condition, params = keyset_condition("messages", before)
+    keyset_sql = f"AND {condition}" if condition else ""
     with get_cursor() as cursor:
         cursor.execute(
-            """
+            f"""
             SELECT messages.*, u.nickname AS sender_name
             FROM messages JOIN users u ON messages.sender_id = u.id
-            WHERE receiver_id=%s ORDER BY created_at DESC
+            WHERE receiver_id=%s {keyset_sql}
+            ORDER BY messages.created_at DESC, messages.id DESC LIMIT %s
             """,
-            (user_id,),
+            (user_id, *params, limit),
         )
         return cursor.fetchall()
 
 
-def list_outbox(user_id: int) -> List[Dict]:
+def list_outbox(user_id: int, limit: int = 20, before: Optional[Keyset] = None) -> List[Dict]:
+    condition, params = keyset_condition("messages", before)
+    keyset_sql = f"AND {condition}" if condition else ""
     with get_cursor() as cursor:
         cursor.execute(
-            """
+            f"""
             SELECT messages.*, u.nickname AS receiver_name
             FROM messages JOIN users u ON messages.receiver_id = u.id
-            WHERE sender_id=%s ORDER BY created_at DESC
+            WHERE sender_id=%s {keyset_sql}
+            ORDER BY messages.created_at DESC, messages.id DESC LIMIT %s
             """,
-            (user_id,),
+            (user_id, *params, limit),
         )
         return cursor.fetchall()
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+# 键集分页位置：上一页最后一行的 (created_at, id)，created_at 为 "YYYY-MM-DD HH:MM:SS"
+Keyset = Tuple[str, int]
+
+
+def keyset_condition(
+    table: str, before: Optional[Keyset], id_column: str = "id", descending: bool = True
+) -> Tuple[str, List]:
+    """生成 "位于 before 之后" 的条件，配合 ORDER BY created_at DESC, id DESC 走 (…, created_at, id) 索引
+
+    descending=False 时用于正序列表（ORDER BY created_at, id），条件变为大于游标位置。
+    """
+
+    if before is None:
+        return "", []
+    created_at, row_id = before
+    op = "<" if descending else ">"
+    sql = f"({table}.created_at {op} %s OR ({table}.created_at = %s AND {table}.{id_column} {op} %s))"
+    return sql, [created_at, created_at, row_id]
@@ -2,17 +2,9 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import get_cursor
-
-REACTION_JOIN = """
-    LEFT JOIN (
-        SELECT post_id,
-               SUM(CASE WHEN reaction_type = 'like' THEN 1 ELSE 0 END) AS like_count,
-               SUM(CASE WHEN reaction_type = 'favorite' THEN 1 ELSE 0 END) AS favorite_count
-        FROM reactions
-        GROUP BY post_id
-    ) AS react ON react.post_id = posts.id
-"""
+from .db import get_cursor, transaction
+from .loader import Loader
+from .pagination import Keyset, keyset_condition
 
 
 def create_post(author_id: int, title: str, body: str, tags: str | None) -> int:
@@ -22,20 +14,20 @@ def create_post(author_id: int, title: str, body: str, tags: str | None) -> int:
         return cursor.lastrowid
 
 
-def list_posts(limit: int = 20, offset: int = 0) -> List[Dict]:
+def list_posts(limit: int = 20, before: Optional[Keyset] = None) -> List[Dict]:
+    condition, params = keyset_condition("posts", before)
+    keyset_sql = f"WHERE {condition}" if condition else ""
     with get_cursor() as cursor:
         cursor.execute(
             f"""
-            SELECT posts.*, users.nickname AS author_name,
-                   COALESCE(react.like_count, 0) AS like_count,
-                   COALESCE(react.favorite_count, 0) AS favorite_count
+            SELECT posts.*, users.nickname AS author_name
             FROM posts
             JOIN users ON posts.author_id = users.id
-            {REACTION_JOIN}
-            ORDER BY posts.created_at DESC
-            LIMIT %s OFFSET %s
+            {keyset_sql}
+            ORDER BY posts.created_at DESC, posts.id DESC
+            LIMIT %s
             """,
-            (limit, offset),
+            (*params, limit),
         )
         return cursor.fetchall()
 
@@ -43,14 +35,11 @@ def list_posts(limit: int = 20, offset: int = 0) -> List[Dict]:
 def list_by_author(author_id: int, limit: int = 20) -> List[Dict]:
     with get_cursor() as cursor:
         cursor.execute(
-            f"""
-            SELECT posts.*,
-                   COALESCE(react.like_count, 0) AS like_count,
-                   COALESCE(react.favorite_count, 0) AS favorite_count
+            """
+            SELECT posts.*
             FROM posts
-            {REACTION_JOIN}
             WHERE posts.author_id = %s
-            ORDER BY posts.created_at DESC
+            ORDER BY posts.created_at DESC, posts.id DESC
             LIMIT %s
             """,
             (author_id, limit),
@@ -58,51 +47,125 @@ def list_by_author(author_id: int, limit: int = 20) -> List[Dict]:
         return cursor.fetchall()
 
 
-def search_posts(keyword: str | None, tag: str | None, limit: int = 20, offset: int = 0) -> List[Dict]:
+def list_by_authors(author_ids: List[int], limit: int = 20, before: Optional[Keyset] = None) -> List[Dict]:
+    """多位作者的最新文章，供关注流对粉丝过多的作者在读取时合并"""
+
+    if not author_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(author_ids))
+    condition, params = keyset_condition("posts", before)
+    keyset_sql = f"AND {condition}" if condition else ""
     with get_cursor() as cursor:
-        sql = [
-            """
-            SELECT posts.*, users.nickname AS author_name,
-                   COALESCE(react.like_count, 0) AS like_count,
-                   COALESCE(react.favorite_count, 0) AS favorite_count
+        cursor.execute(
+            f"""
+            SELECT posts.*, users.nickname AS author_name
             FROM posts
             JOIN users ON posts.author_id = users.id
+            WHERE posts.author_id IN ({placeholders}) {keyset_sql}
+            ORDER BY posts.created_at DESC, posts.id DESC
+            LIMIT %s
             """,
-            REACTION_JOIN,
-        ]
+            (*author_ids, *params, limit),
+        )
+        return cursor.fetchall()
+
+
+def search_posts(
+    keyword: str | None, tag: str | None, limit: int = 20, before: Optional[Keyset] = None
+) -> List[Dict]:
+    """按关键词与标签筛选；有标签时从 post_tags 的 (tag_id, created_at, post_id) 索引按时间倒序取行"""
+
+    with get_cursor() as cursor:
+        sql = ["SELECT posts.*, users.nickname AS author_name"]
         conditions = []
         params: list = []
+        if tag:
+            # post_tags 上的 created_at 与 posts 一致，排序与分页条件都落在标签索引上
+            sql.append(
+                """
+                FROM post_tags
+                JOIN tags ON tags.id = post_tags.tag_id
+                JOIN posts ON posts.id = post_tags.post_id
+                JOIN users ON posts.author_id = users.id
+                """
+            )
+            conditions.append("tags.name = %s")
+            params.append(tag)
+            order_table, order_id = "post_tags", "post_id"
+        else:
+            sql.append("FROM posts JOIN users ON posts.author_id = users.id")
+            order_table, order_id = "posts", "id"
         if keyword:
             like = f"%{keyword}%"
             conditions.append("(posts.title LIKE %s OR posts.body LIKE %s)")
             params.extend([like, like])
-        if tag:
-            conditions.append("posts.tags = %s")
-            params.append(tag)
+        condition, keyset_params = keyset_condition(order_table, before, order_id)
+        if condition:
+            conditions.append(condition)
+            params.extend(keyset_params)
         if conditions:
             sql.append("WHERE " + " AND ".join(conditions))
-        sql.append("ORDER BY posts.created_at DESC LIMIT %s OFFSET %s")
-        params.extend([limit, offset])
+        sql.append(f"ORDER BY {order_table}.created_at DESC, {order_table}.{order_id} DESC LIMIT %s")
+        params.append(limit)
         cursor.execute(" ".join(sql), params)
         return cursor.fetchall()
 
 
-def list_categories(limit: int = 10) -> List[Dict]:
+def get_posts_by_ids(post_ids: List[int]) -> List[Dict]:
+    """按给定 id 批量读取文章，结果顺序与 post_ids 一致"""
+
+    if not post_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(post_ids))
     with get_cursor() as cursor:
         cursor.execute(
-            """
-            SELECT tags AS category, COUNT(*) AS count
+            f"""
+            SELECT posts.*, users.nickname AS author_name
             FROM posts
-            WHERE tags IS NOT NULL AND tags <> ''
-            GROUP BY tags
-            ORDER BY count DESC
-            LIMIT %s
+            JOIN users ON posts.author_id = users.id
+            WHERE posts.id IN ({placeholders})
             """,
-            (limit,),
+            post_ids,
         )
+        by_id = {row["id"]: row for row in cursor.fetchall()}
+    return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+
+def list_changed_since(since: Optional[str]) -> List[Dict]:
+    """供搜索索引增量同步，since 为空时返回全部文章"""
+
+    with get_cursor() as cursor:
+        if since is None:
+            cursor.execute("SELECT id, title, body, tags, updated_at FROM posts")
+        else:
+            cursor.execute("SELECT id, title, body, tags, updated_at FROM posts WHERE updated_at >= %s", (since,))
+        return cursor.fetchall()
+
+
+def list_deleted_since(since: Optional[str]) -> List[Dict]:
+    """供搜索索引同步删除，沿 post_deletions (deleted_at) 索引；since 为空时返回全部未清理的记录"""
+
+    with get_cursor() as cursor:
+        if since is None:
+            cursor.execute("SELECT post_id, deleted_at FROM post_deletions")
+        else:
+            cursor.execute("SELECT post_id, deleted_at FROM post_deletions WHERE deleted_at >= %s", (since,))
         return cursor.fetchall()
 
 
+def prune_deletions(retention_seconds: int) -> int:
+    with get_cursor() as cursor:
+        return cursor.execute(
+            "DELETE FROM post_deletions WHERE deleted_at < NOW() - INTERVAL %s SECOND", (retention_seconds,)
+        )
+
+
+def list_ids() -> List[int]:
+    with get_cursor() as cursor:
+        cursor.execute("SELECT id FROM posts")
+        return [row["id"] for row in cursor.fetchall()]
+
+
 def get_post_stats() -> Dict:
     with get_cursor() as cursor:
         cursor.execute("SELECT COUNT(*) AS total_posts, MAX(created_at) AS latest_created_at FROM posts")
@@ -113,13 +176,10 @@ def get_post_stats() -> Dict:
 def get_post(post_id: int) -> Optional[Dict]:
     with get_cursor() as cursor:
         cursor.execute(
-            f"""
-            SELECT posts.*, users.nickname AS author_name,
-                   COALESCE(react.like_count, 0) AS like_count,
-                   COALESCE(react.favorite_count, 0) AS favorite_count
+            """
+            SELECT posts.*, users.nickname AS author_name
             FROM posts
             JOIN users ON posts.author_id = users.id
-            {REACTION_JOIN}
             WHERE posts.id = %s
             """,
             (post_id,),
@@ -127,9 +187,21 @@ def get_post(post_id: int) -> Optional[Dict]:
         return cursor.fetchone()
 
 
-def delete_post(post_id: int, author_id: int) -> bool:
+def lock_own_post(post_id: int, author_id: int) -> bool:
+    """在事务内锁住作者本人的文章行，文章不存在或不属于该作者时返回 False"""
+
     with get_cursor() as cursor:
+        cursor.execute("SELECT id FROM posts WHERE id=%s AND author_id=%s FOR UPDATE", (post_id, author_id))
+        return cursor.fetchone() is not None
+
+
+def delete_post(post_id: int, author_id: int) -> bool:
+    """删除文章并在同一事务内写入删除记录，其他进程的搜索索引据此增量移除"""
+
+    with transaction(), get_cursor() as cursor:
         rows = cursor.execute("DELETE FROM posts WHERE id=%s AND author_id=%s", (post_id, author_id))
+        if rows:
+            cursor.execute("INSERT IGNORE INTO post_deletions (post_id) VALUES (%s)", (post_id,))
         return rows > 0
 
 
@@ -143,15 +215,12 @@ def update_post(post_id: int, author_id: int, title: str, body: str, tags: str |
 def list_reacted_by_user(user_id: int, reaction_type: str, limit: int = 20) -> List[Dict]:
     with get_cursor() as cursor:
         cursor.execute(
-            f"""
+            """
             SELECT posts.*, users.nickname AS author_name,
-                   COALESCE(react.like_count, 0) AS like_count,
-                   COALESCE(react.favorite_count, 0) AS favorite_count,
                    reacts.created_at AS reacted_at
             FROM reactions AS reacts
             JOIN posts ON reacts.post_id = posts.id
             JOIN users ON posts.author_id = users.id
-            {REACTION_JOIN}
             WHERE reacts.user_id = %s AND reacts.reaction_type = %s
             ORDER BY reacts.created_at DESC
             LIMIT %s
@@ -159,3 +228,6 @@ def list_reacted_by_user(user_id: int, reaction_type: str, limit: int = 20) -> L
             (user_id, reaction_type, limit),
         )
         return cursor.fetchall()
+
+
+posts_by_id = Loader("posts", lambda post_ids: {row["id"]: row for row in get_posts_by_ids(post_ids)})
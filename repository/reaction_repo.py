@@ -1,35 +1,54 @@
 from __future__ import annotations
 
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set
 
-from .db import get_cursor
+from .db import get_cursor, transaction
 
+# 反应类型 -> posts 表上的计数列
+COUNTER_COLUMNS = {"like": "like_count", "favorite": "favorite_count"}
 
-def toggle_reaction(post_id: int, user_id: int, reaction_type: str) -> Dict[str, int]:
-    """点赞或收藏，若已存在则删除"""
 
-    with get_cursor() as cursor:
-        cursor.execute(
+def toggle_reaction(post_id: int, user_id: int, reaction_type: str) -> Optional[Dict[str, int]]:
+    """点赞或收藏，若已存在则删除；同一事务内增减 posts 上的计数并返回新计数，文章不存在时返回 None"""
+
+    column = COUNTER_COLUMNS[reaction_type]
+    with transaction(), get_cursor() as cursor:
+        # 先锁住文章行，同一文章的并发切换串行执行，计数不会丢失更新
+        cursor.execute("SELECT like_count, favorite_count FROM posts WHERE id=%s FOR UPDATE", (post_id,))
+        counts = cursor.fetchone()
+        if counts is None:
+            return None
+        deleted = cursor.execute(
             "DELETE FROM reactions WHERE post_id=%s AND user_id=%s AND reaction_type=%s",
             (post_id, user_id, reaction_type),
         )
-        if cursor.rowcount == 0:
+        if not deleted:
             cursor.execute(
                 "INSERT INTO reactions (post_id, user_id, reaction_type) VALUES (%s, %s, %s)",
                 (post_id, user_id, reaction_type),
             )
+        delta = -1 if deleted else 1
+        # 计数变化不算文章修改，保持 updated_at 不变，避免触发搜索索引重新同步
         cursor.execute(
-            "SELECT reaction_type, COUNT(*) AS cnt FROM reactions WHERE post_id=%s GROUP BY reaction_type",
-            (post_id,),
+            f"UPDATE posts SET {column} = GREATEST({column} + %s, 0), updated_at = updated_at WHERE id=%s",
+            (delta, post_id),
         )
-        stats = {row["reaction_type"]: row["cnt"] for row in cursor.fetchall()}
-        return {"like": stats.get("like", 0), "favorite": stats.get("favorite", 0)}
+        counts[column] = max(int(counts[column]) + delta, 0)
+        return {"like": int(counts["like_count"]), "favorite": int(counts["favorite_count"])}
+
 
+def get_user_reactions_for_posts(user_id: int, post_ids: List[int]) -> Dict[int, Set[str]]:
+    """一次 IN 查询取出用户对多篇文章的反应，走 uniq_reaction (post_id, user_id, reaction_type) 索引"""
 
-def get_user_reactions(post_id: int, user_id: int) -> Set[str]:
+    reactions: Dict[int, Set[str]] = {post_id: set() for post_id in post_ids}
+    if not post_ids:
+        return reactions
+    placeholders = ", ".join(["%s"] * len(post_ids))
     with get_cursor() as cursor:
         cursor.execute(
-            "SELECT reaction_type FROM reactions WHERE post_id=%s AND user_id=%s",
-            (post_id, user_id),
+            f"SELECT post_id, reaction_type FROM reactions WHERE user_id=%s AND post_id IN ({placeholders})",
+            (user_id, *post_ids),
         )
-        return {row["reaction_type"] for row in cursor.fetchall()}
+        for row in cursor.fetchall():
+            reactions[row["post_id"]].add(row["reaction_type"])
+    return reactions
@@ -1,43 +1,68 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import List
 
-from .db import get_cursor
+from .db import get_cursor, transaction
 
 
-def follow(follower_id: int, author_id: int) -> None:
-    with get_cursor() as cursor:
-        cursor.execute(
+def follow(follower_id: int, author_id: int, fanout_limit: int) -> bool:
+    """关注作者并增加其粉丝数，粉丝数超过 fanout_limit 时把作者标记为读时合并；已关注时返回 False"""
+
+    with transaction(), get_cursor() as cursor:
+        inserted = cursor.execute(
             "INSERT IGNORE INTO subscriptions (follower_id, author_id) VALUES (%s, %s)",
             (follower_id, author_id),
         )
+        if inserted:
+            # MySQL 按书写顺序执行 SET，fanout_on_read 比较的是加一之后的粉丝数；标记一旦置位不再清除
+            cursor.execute(
+                """
+                UPDATE users
+                SET follower_count = follower_count + 1,
+                    fanout_on_read = fanout_on_read OR follower_count > %s
+                WHERE id = %s
+                """,
+                (fanout_limit, author_id),
+            )
+        return bool(inserted)
+
+
+def unfollow(follower_id: int, author_id: int) -> bool:
+    with transaction(), get_cursor() as cursor:
+        deleted = cursor.execute(
+            "DELETE FROM subscriptions WHERE follower_id=%s AND author_id=%s", (follower_id, author_id)
+        )
+        if deleted:
+            cursor.execute(
+                "UPDATE users SET follower_count = GREATEST(follower_count - 1, 0) WHERE id = %s", (author_id,)
+            )
+        return bool(deleted)
+
+
+def is_fanout_on_read(author_id: int) -> bool:
+    with get_cursor() as cursor:
+        cursor.execute("SELECT fanout_on_read FROM users WHERE id=%s", (author_id,))
+        row = cursor.fetchone()
+        return bool(row and row["fanout_on_read"])
+
 
+def list_fanout_on_read_authors() -> List[int]:
+    """粉丝过多、文章不推入时间线的作者，走 idx_users_fanout_on_read 索引"""
 
-def unfollow(follower_id: int, author_id: int) -> None:
     with get_cursor() as cursor:
-        cursor.execute("DELETE FROM subscriptions WHERE follower_id=%s AND author_id=%s", (follower_id, author_id))
+        cursor.execute("SELECT id FROM users WHERE fanout_on_read = 1")
+        return [row["id"] for row in cursor.fetchall()]
 
 
-def list_feed(user_id: int, limit: int = 20) -> List[Dict]:
-    """列出关注作者的最新文章"""
+def list_followed_among(follower_id: int, author_ids: List[int]) -> List[int]:
+    """author_ids 中被 follower_id 关注的作者"""
 
+    if not author_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(author_ids))
     with get_cursor() as cursor:
         cursor.execute(
-            """
-            SELECT posts.*, users.nickname AS author_name
-            FROM posts
-            JOIN subscriptions ON posts.author_id = subscriptions.author_id
-            JOIN users ON users.id = posts.author_id
-            LEFT JOIN (
-                SELECT post_id,
-                       SUM(CASE WHEN reaction_type = 'like' THEN 1 ELSE 0 END) AS like_count,
-                       SUM(CASE WHEN reaction_type = 'favorite' THEN 1 ELSE 0 END) AS favorite_count
-                FROM reactions
-                GROUP BY post_id
-            ) AS react ON react.post_id = posts.id
-            WHERE subscriptions.follower_id=%s
-            ORDER BY posts.created_at DESC LIMIT %s
-            """,
-            (user_id, limit),
+            f"SELECT author_id FROM subscriptions WHERE follower_id=%s AND author_id IN ({placeholders})",
+            (follower_id, *author_ids),
         )
-        return cursor.fetchall()
+        return [row["author_id"] for row in cursor.fetchall()]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+from .db import get_cursor
+
+# 单篇文章最多的标签数与单个标签的最大长度，保证拼接后的 posts.tags 不超过列宽
+MAX_TAGS = 8
+MAX_TAG_LENGTH = 30
+_SEPARATOR_RE = re.compile(r"[,，、;；]")
+
+
+def split_tags(raw: str | None) -> List[str]:
+    """把逗号分隔的标签串拆成去重后的标签列表，保持输入顺序"""
+
+    names: List[str] = []
+    seen = set()
+    for part in _SEPARATOR_RE.split(raw or ""):
+        name = part.strip()[:MAX_TAG_LENGTH]
+        # tags.name 的排序规则不区分大小写，"Go" 与 "go" 是同一个标签
+        if name and name.casefold() not in seen:
+            seen.add(name.casefold())
+            names.append(name)
+    return names[:MAX_TAGS]
+
+
+def set_post_tags(post_id: int, names: List[str]) -> Tuple[List[str], List[str]]:
+    """把文章的标签改为 names，同步 post_tags 与 tags.post_count，返回 (新增的标签, 移除的标签)
+
+    需在事务内调用，调用方应已锁住文章行。
+    """
+
+    with get_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT tags.id, tags.name
+            FROM post_tags
+            JOIN tags ON tags.id = post_tags.tag_id
+            WHERE post_tags.post_id = %s
+            """,
+            (post_id,),
+        )
+        current = {row["name"].casefold(): (row["name"], row["id"]) for row in cursor.fetchall()}
+        wanted = {name.casefold() for name in names}
+        added = [name for name in names if name.casefold() not in current]
+        removed = [name for key, (name, _) in current.items() if key not in wanted]
+        if removed:
+            removed_ids = [current[name.casefold()][1] for name in removed]
+            placeholders = ", ".join(["%s"] * len(removed_ids))
+            cursor.execute(
+                f"DELETE FROM post_tags WHERE post_id = %s AND tag_id IN ({placeholders})",
+                (post_id, *removed_ids),
+            )
+            cursor.execute(
+                f"UPDATE tags SET post_count = GREATEST(post_count - 1, 0) WHERE id IN ({placeholders})",
+                removed_ids,
+            )
+        if added:
+            placeholders = ", ".join(["%s"] * len(added))
+            cursor.executemany("INSERT IGNORE INTO tags (name) VALUES (%s)", [(name,) for name in added])
+            cursor.execute(f"SELECT id FROM tags WHERE name IN ({placeholders})", added)
+            added_ids = [row["id"] for row in cursor.fetchall()]
+            # created_at 冗余自 posts，按标签筛选时直接沿 (tag_id, created_at, post_id) 索引分页
+            cursor.executemany(
+                """
+                INSERT INTO post_tags (post_id, tag_id, created_at)
+                SELECT id, %s, created_at FROM posts WHERE id = %s
+                """,
+                [(tag_id, post_id) for tag_id in added_ids],
+            )
+            cursor.execute(
+                f"UPDATE tags SET post_count = post_count + 1 WHERE id IN ({', '.join(['%s'] * len(added_ids))})",
+                added_ids,
+            )
+        return added, removed
+
+
+def list_top_tags(limit: int) -> List[Dict]:
+    """按文章数取最热门的标签，走 idx_tags_post_count 索引，不扫描 posts"""
+
+    with get_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT name AS category, post_count AS count
+            FROM tags
+            WHERE post_count > 0
+            ORDER BY post_count DESC, id DESC
+            LIMIT %s
+            """,
+            (limit,),
+        )
+        return cursor.fetchall()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from .db import get_cursor
+from .pagination import Keyset, keyset_condition
+
+
+def fan_out(post_id: int) -> int:
+    """把新文章推入作者所有关注者的时间线，返回写入的行数"""
+
+    with get_cursor() as cursor:
+        return cursor.execute(
+            """
+            INSERT IGNORE INTO timelines (user_id, post_id, author_id, created_at)
+            SELECT subscriptions.follower_id, posts.id, posts.author_id, posts.created_at
+            FROM posts
+            JOIN subscriptions ON subscriptions.author_id = posts.author_id
+            WHERE posts.id = %s
+            """,
+            (post_id,),
+        )
+
+
+def backfill(user_id: int, author_id: int, limit: int) -> int:
+    """关注后把作者最近的 limit 篇文章补进关注者的时间线"""
+
+    with get_cursor() as cursor:
+        return cursor.execute(
+            """
+            INSERT IGNORE INTO timelines (user_id, post_id, author_id, created_at)
+            SELECT %s, id, author_id, created_at
+            FROM posts
+            WHERE author_id = %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+            """,
+            (user_id, author_id, limit),
+        )
+
+
+def prune_author(user_id: int, author_id: int) -> int:
+    """取消关注后移除该作者在关注者时间线中的文章"""
+
+    with get_cursor() as cursor:
+        return cursor.execute("DELETE FROM timelines WHERE user_id=%s AND author_id=%s", (user_id, author_id))
+
+
+def list_timeline(user_id: int, limit: int = 20, before: Optional[Keyset] = None) -> List[Dict]:
+    """沿 (user_id, created_at, post_id) 索引读取时间线，只做一次范围扫描"""
+
+    condition, params = keyset_condition("timelines", before, "post_id")
+    keyset_sql = f"AND {condition}" if condition else ""
+    with get_cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT posts.*, users.nickname AS author_name
+            FROM timelines
+            JOIN posts ON posts.id = timelines.post_id
+            JOIN users ON users.id = timelines.author_id
+            WHERE timelines.user_id=%s {keyset_sql}
+            ORDER BY timelines.created_at DESC, timelines.post_id DESC LIMIT %s
+            """,
+            (user_id, *params, limit),
+        )
+        return cursor.fetchall()
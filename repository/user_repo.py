@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from .db import get_cursor
+from .loader import Loader
 
 
 def create_user(username: str, password_hash: str, salt: str, nickname: str, email: str | None) -> int:
@@ -27,3 +28,14 @@ def find_by_id(user_id: int) -> Optional[Dict]:
     with get_cursor() as cursor:
         cursor.execute("SELECT * FROM users WHERE id=%s", (user_id,))
         return cursor.fetchone()
+
+
+def find_by_ids(user_ids: List[int]) -> Dict[int, Dict]:
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with get_cursor() as cursor:
+        cursor.execute(f"SELECT * FROM users WHERE id IN ({placeholders})", user_ids)
+        return {row["id"]: row for row in cursor.fetchall()}
+
+
+# 同一请求内多次读取当前用户或作者只查询一次
+users_by_id = Loader("users", find_by_ids)
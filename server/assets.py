@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass
+class FingerprintedAsset:
+    """带内容哈希文件名的静态资源，内容与 gzip 版本常驻内存"""
+
+    logical_path: str
+    hashed_path: str
+    content_type: str
+    etag: str
+    data: bytes
+    gzip_data: Optional[bytes]
+    # gzip 版本与原文字节不同，使用独立的强 ETag
+    gzip_etag: Optional[str]
+
+
+class AssetManifest:
+    """启动时为 STATIC_ROOT 下的文件计算内容哈希，并预压缩可压缩的资源"""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._by_logical: Dict[str, FingerprintedAsset] = {}
+        self._by_hashed: Dict[str, FingerprintedAsset] = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        by_logical: Dict[str, FingerprintedAsset] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                file_path = os.path.join(dirpath, filename)
+                if os.path.getsize(file_path) > config.STATIC_CACHE_MAX_FILE:
+                    continue
+                logical_path = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                by_logical[logical_path] = self._fingerprint(logical_path, data)
+        with self._lock:
+            self._by_logical = by_logical
+            self._by_hashed = {asset.hashed_path: asset for asset in by_logical.values()}
+            self._built = True
+        logger.info("静态资源清单已生成: %s 个文件", len(by_logical))
+
+    def url_for(self, logical_path: str) -> str:
+        """模板中使用的资源地址，存在指纹版本时返回带哈希的文件名"""
+
+        self._ensure_built()
+        asset = self._by_logical.get(logical_path.lstrip("/"))
+        if asset is None:
+            return f"/static/{logical_path.lstrip('/')}"
+        return f"/static/{asset.hashed_path}"
+
+    def lookup(self, hashed_path: str) -> Optional[FingerprintedAsset]:
+        self._ensure_built()
+        return self._by_hashed.get(hashed_path)
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self.build()
+
+    @staticmethod
+    def _fingerprint(logical_path: str, data: bytes) -> FingerprintedAsset:
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(logical_path)
+        content_type = mimetypes.guess_type(logical_path)[0] or "application/octet-stream"
+        gzip_data = None
+        if any(content_type.startswith(allowed) for allowed in config.COMPRESSION_TYPES):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                gzip_data = compressed
+        return FingerprintedAsset(
+            logical_path=logical_path,
+            hashed_path=f"{stem}.{digest}{ext}",
+            content_type=content_type,
+            etag=f'"{digest}"',
+            data=data,
+            gzip_data=gzip_data,
+            gzip_etag=f'"{digest}-gzip"' if gzip_data is not None else None,
+        )
+
+
+asset_manifest = AssetManifest(config.STATIC_ROOT)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from .metrics import metrics_collector
+from .rate_limit import rate_limiter
+from .request_handler import (
+    apply_connection_headers,
+    error_payload,
+    overload_payload,
+    process_request,
+    rate_limited_payload,
+    should_keep_alive,
+)
+from .request_reader import CONTINUE_RESPONSE, FramingError, RequestFramer
+from .router import Router
+from .timeouts import PHASE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpServer:
+    """基于 asyncio 事件循环的 HTTP 服务器，阻塞的处理器调用交给线程池执行"""
+
+    def __init__(self, host: str, port: int, router: Router, reuse_port: bool = False) -> None:
+        self.host = host
+        self.port = port
+        self.router = router
+        self.reuse_port = reuse_port
+        self._executor = ThreadPoolExecutor(max_workers=config.WORKER_THREADS, thread_name_prefix="http-exec")
+        # 线程池任务数上限，超过后直接返回 503，与线程引擎的有界队列保持一致
+        self._max_inflight = config.WORKER_THREADS + config.CONNECTION_QUEUE_SIZE
+        self._inflight = 0
+        self._connections = 0
+        self._overload_payload = overload_payload()
+
+    def start(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, backlog=128, reuse_port=self.reuse_port or None
+        )
+        metrics_collector.register_gauge("open_connections", lambda: self._connections)
+        metrics_collector.register_gauge("executor_inflight", lambda: self._inflight)
+        metrics_collector.register_gauge("workers_total", lambda: config.WORKER_THREADS)
+        logger.info("服务器启动 (asyncio): %s:%s (处理线程 %s)", self.host, self.port, config.WORKER_THREADS)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername") or ("", 0)
+        client_ip = f"{peer[0]}:{peer[1]}"
+        framer = RequestFramer()
+        served = 0
+        phase = None
+        phase_deadline = 0.0
+        request_started = None
+        loop = asyncio.get_running_loop()
+        self._connections += 1
+        try:
+            while True:
+                try:
+                    raw_data = framer.next_request()
+                except FramingError as exc:
+                    metrics_collector.incr(f"rejected_{exc.status}")
+                    writer.write(error_payload(exc.status, str(exc)))
+                    await writer.drain()
+                    break
+                if raw_data is None:
+                    if framer.expect_continue:
+                        framer.expect_continue = False
+                        writer.write(CONTINUE_RESPONSE)
+                    if framer.phase != phase:
+                        # 与线程引擎的 reaper 一致：每个阶段从进入时起计时，慢速逐字节发送也无法续期
+                        phase = framer.phase
+                        phase_deadline = loop.time() + PHASE_TIMEOUTS[phase]
+                    try:
+                        data = await asyncio.wait_for(
+                            reader.read(config.RECV_BUFFER_SIZE), timeout=max(phase_deadline - loop.time(), 0)
+                        )
+                    except asyncio.TimeoutError:
+                        metrics_collector.incr(f"timeouts_{phase}")
+                        break
+                    except ConnectionError:
+                        break
+                    if not data:
+                        break
+                    if request_started is None and phase == "idle":
+                        request_started = time.monotonic()
+                    framer.feed(data)
+                    continue
+                served += 1
+                phase = None
+                deadline = (request_started or time.monotonic()) + config.REQUEST_DEADLINE
+                request_started = None
+                if self._inflight >= self._max_inflight:
+                    metrics_collector.incr("rejected_connections")
+                    writer.write(self._overload_payload)
+                    await writer.drain()
+                    break
+                retry_after = rate_limiter.check(peer[0], raw_data)
+                if retry_after:
+                    writer.write(rate_limited_payload(retry_after))
+                    await writer.drain()
+                    break
+                if not await self._serve_request(writer, raw_data, client_ip, served, deadline):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections -= 1
+            writer.close()
+            metrics_collector.incr("connections_closed")
+            metrics_collector.observe("requests_per_connection", served)
+
+    async def _serve_request(
+        self, writer: asyncio.StreamWriter, raw_data: bytes, client_ip: str, served: int, deadline: float
+    ) -> bool:
+        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self._inflight += 1
+        try:
+            request, response = await loop.run_in_executor(
+                self._executor, process_request, self.router, raw_data, client_ip, deadline
+            )
+        finally:
+            self._inflight -= 1
+        keep_alive = should_keep_alive(request, served)
+        apply_connection_headers(response, keep_alive, served)
+        bytes_out = 0
+        try:
+            if response.is_file:
+                header = response.header_bytes()
+                writer.write(header)
+                await self._drain(writer)
+                file_body = response.body
+                with open(file_body.path, "rb") as f:
+                    sent = await loop.sendfile(writer.transport, f, file_body.offset, file_body.count)
+                bytes_out = len(header) + sent
+            elif not response.is_streaming:
+                for buffers in response.iter_buffers():
+                    writer.writelines(buffers)
+                    bytes_out += sum(len(buffer) for buffer in buffers)
+                await self._drain(writer)
+            else:
+                # 流式包体（如 Jinja generate）可能阻塞，逐块在线程池中生成
+                frames = response.iter_buffers()
+                while True:
+                    buffers = await loop.run_in_executor(self._executor, next, frames, None)
+                    if buffers is None:
+                        break
+                    writer.writelines(buffers)
+                    bytes_out += sum(len(buffer) for buffer in buffers)
+                    await self._drain(writer)
+        except ConnectionError:
+            raise
+        except Exception as exc:
+            logger.exception("生成响应包体出错: %s", exc)
+            keep_alive = False
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            metrics_collector.record(duration_ms, len(raw_data), bytes_out)
+        return keep_alive
+
+    @staticmethod
+    async def _drain(writer: asyncio.StreamWriter) -> None:
+        """等待发送缓冲区排空，客户端长时间不读取时按写超时断开"""
+
+        try:
+            await asyncio.wait_for(writer.drain(), timeout=config.WRITE_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics_collector.incr("timeouts_write")
+            raise ConnectionError("write timeout") from None
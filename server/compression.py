@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import config
+from .http_request import HttpRequest
+from .http_response import HttpResponse
+from .metrics import metrics_collector
+
+# zlib 的 wbits：31 表示 gzip 封装，15 表示 HTTP 中 deflate 所指的 zlib 格式
+_WBITS = {"gzip": 31, "deflate": 15}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """按 Accept-Encoding 的 q 值选择 gzip 或 deflate，均不可用时返回 None"""
+
+    best: Optional[str] = None
+    best_q = 0.0
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        candidates = list(_WBITS) if name == "*" else [name]
+        for candidate in candidates:
+            if candidate not in _WBITS or q <= 0:
+                continue
+            # q 值相同时优先 gzip，兼容性最好
+            if q > best_q or (q == best_q and candidate == "gzip"):
+                best, best_q = candidate, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return any(media_type.startswith(allowed) for allowed in config.COMPRESSION_TYPES)
+
+
+def apply_encoding_headers(request: Optional[HttpRequest], response: HttpResponse) -> Optional[str]:
+    """设置取决于内容编码的响应头，返回协商出的编码
+
+    可压缩类型一律带 Vary: Accept-Encoding；只要协商出编码就把强 ETag 降为弱 ETag，
+    不论包体最终是否因过小而未压缩，这样 304 与其验证的 200 携带相同的 Vary 与 ETag。
+    """
+
+    if not config.COMPRESSION_ENABLED or request is None:
+        return None
+    if response.is_file or "Content-Encoding" in response.headers:
+        return None
+    if not _is_compressible(response.headers.get("Content-Type", "")):
+        return None
+    response.headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    etag = response.headers.get("ETag")
+    if encoding is not None and etag and not etag.startswith("W/"):
+        # 强 ETag 只对应未压缩的表示
+        response.headers["ETag"] = "W/" + etag
+    return encoding
+
+
+def compress_response(request: Optional[HttpRequest], response: HttpResponse) -> HttpResponse:
+    """根据请求的 Accept-Encoding 原地压缩响应包体"""
+
+    if response.status_code not in (200, 201):
+        return response
+    encoding = apply_encoding_headers(request, response)
+    if encoding is None:
+        return response
+    if response.is_streaming:
+        response.body = _compress_stream(response.body, encoding)
+    else:
+        compressed = compress_body(response.body, encoding)
+        if compressed is None:
+            return response
+        response.body = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def compress_body(body: bytes, encoding: str) -> Optional[bytes]:
+    """一次性压缩整个包体；包体过小或压缩后不更小时返回 None"""
+
+    if len(body) < config.COMPRESSION_MIN_SIZE:
+        return None
+    compressor = zlib.compressobj(config.COMPRESSION_LEVEL, zlib.DEFLATED, _WBITS[encoding])
+    compressed = compressor.compress(body) + compressor.flush()
+    if len(compressed) >= len(body):
+        return None
+    metrics_collector.incr("compression_bytes_in", len(body))
+    metrics_collector.incr("compression_bytes_out", len(compressed))
+    return compressed
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    compressor = zlib.compressobj(config.COMPRESSION_LEVEL, zlib.DEFLATED, _WBITS[encoding])
+    raw_size = 0
+    compressed_size = 0
+    for chunk in chunks:
+        raw_size += len(chunk)
+        # 每块都 Z_SYNC_FLUSH，保证浏览器能尽早开始解压渲染
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        compressed_size += len(data)
+        if data:
+            yield data
+    tail = compressor.flush()
+    compressed_size += len(tail)
+    metrics_collector.incr("compression_bytes_in", raw_size)
+    metrics_collector.incr("compression_bytes_out", compressed_size)
+    if tail:
+        yield tail
@@ -1,72 +1,187 @@
 from __future__ import annotations
 
 import json
+import time
 import urllib.parse
-from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+
+class memoized:
+    """首次访问时计算并写入实例字典；请求对象只在单个线程内使用，无需 cached_property 的锁"""
+
+    def __init__(self, func) -> None:
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class Headers(Mapping[str, str]):
+    """基于原始字节偏移的只读头部映射，键大小写不敏感，值在首次读取时才解码
+
+    start 指向请求行末尾的 CRLF，end 为最后一个头部行 CRLF 之后的位置。
+    """
+
+    __slots__ = ("_view", "_start", "_end", "_lowered", "_decoded")
+
+    def __init__(self, view: memoryview, start: int, end: int) -> None:
+        self._view = view
+        self._start = start
+        self._end = end
+        self._lowered: Optional[bytes] = None
+        self._decoded: Dict[str, Optional[str]] = {}
+
+    def _find(self, key: str) -> Optional[str]:
+        if self._lowered is None:
+            # 头部区域转小写后按 "\r\nname:" 定位，偏移与原始字节一一对应
+            self._lowered = self._view.obj[self._start:self._end].lower()
+        needle = b"\r\n" + key.encode("latin-1") + b":"
+        index = self._lowered.rfind(needle)
+        if index < 0:
+            return None
+        value_start = index + len(needle)
+        value_end = self._lowered.find(b"\r\n", value_start)
+        if value_end < 0:
+            value_end = len(self._lowered)
+        # 头部值很短，直接切片解码比再建 memoryview 更快
+        raw = self._view.obj
+        return raw[self._start + value_start:self._start + value_end].decode("utf-8", "ignore").strip()
+
+    def get(self, name: str, default=None):
+        key = name.lower()
+        if key in self._decoded:
+            value = self._decoded[key]
+        else:
+            value = self._decoded[key] = self._find(key)
+        return default if value is None else value
+
+    def __getitem__(self, name: str) -> str:
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.get(name) is not None
+
+    def _names(self) -> List[str]:
+        names = []
+        for line in str(self._view[self._start:self._end], "latin-1").split("\r\n"):
+            name, sep, _ = line.partition(":")
+            if sep and name.strip().lower() not in names:
+                names.append(name.strip().lower())
+        return names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names())
+
+    def __len__(self) -> int:
+        return len(self._names())
+
+    def __repr__(self) -> str:
+        return f"Headers({dict(self.items())!r})"
 
 
-@dataclass
 class HttpRequest:
-    """封装客户端发来的 HTTP 请求"""
-
-    method: str
-    path: str
-    version: str
-    headers: Dict[str, str]
-    query: Dict[str, str]
-    body: bytes = field(default_factory=bytes)
-    form: Dict[str, str] = field(default_factory=dict)
-    json_data: Optional[dict] = None
-    cookies: Dict[str, str] = field(default_factory=dict)
-    client_addr: str = ""
-    path_params: Dict[str, str] = field(default_factory=dict)
+    """封装客户端发来的 HTTP 请求；头部、查询串、Cookie 与包体均在首次访问时解析"""
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        version: str,
+        raw: bytes = b"",
+        head_start: int = 0,
+        head_end: int = 0,
+        body_start: int = 0,
+        query_string: str = "",
+        client_addr: str = "",
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.version = version
+        self.query_string = query_string
+        self.client_addr = client_addr
+        self.path_params: Dict[str, Any] = {}
+        # time.monotonic() 时间戳，由服务器在分发前设置
+        self.deadline: Optional[float] = None
+        self._view = memoryview(raw)
+        self._head_start = head_start
+        self._head_end = head_end
+        self._body_start = body_start or len(raw)
 
     @staticmethod
     def parse(raw_data: bytes, client_addr: str) -> "HttpRequest":
-        """解析套接字收到的原始字节流"""
+        """解析套接字收到的原始字节流，只切出请求行，其余部分按需解析"""
 
-        try:
-            header_blob, body = raw_data.split(b"\r\n\r\n", 1)
-        except ValueError:
-            header_blob = raw_data
-            body = b""
-        lines = header_blob.decode("utf-8", errors="ignore").split("\r\n")
-        request_line = lines[0]
-        method, url, version = request_line.split()
+        head_end = raw_data.find(b"\r\n\r\n")
+        if head_end < 0:
+            head_end = len(raw_data)
+            body_start = len(raw_data)
+        else:
+            body_start = head_end + 4
+        line_end = raw_data.find(b"\r\n", 0, head_end)
+        if line_end < 0:
+            line_end = head_end
+        head_start = line_end
+        parts = raw_data[:line_end].decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("请求行格式错误")
+        method, url, version = parts
         path, _, query_string = url.partition("?")
-        headers: Dict[str, str] = {}
-        for line in lines[1:]:
-            if not line:
-                continue
-            name, _, value = line.partition(":")
-            headers[name.strip().lower()] = value.strip()
-        query = dict(urllib.parse.parse_qsl(query_string))
-        cookies = HttpRequest._parse_cookies(headers.get("cookie", ""))
-        form: Dict[str, str] = {}
-        json_data: Optional[dict] = None
-        content_type = headers.get("content-type", "")
-        if body:
-            if "application/json" in content_type:
-                try:
-                    json_data = json.loads(body.decode("utf-8"))
-                except json.JSONDecodeError:
-                    json_data = None
-            elif "application/x-www-form-urlencoded" in content_type:
-                form = dict(urllib.parse.parse_qsl(body.decode("utf-8")))
+        if "%" in path:
+            path = urllib.parse.unquote(path)
         return HttpRequest(
-            method=method.upper(),
-            path=urllib.parse.unquote(path),
-            version=version,
-            headers=headers,
-            query=query,
-            body=body,
-            form=form,
-            json_data=json_data,
-            cookies=cookies,
-            client_addr=client_addr,
+            method.upper(), path, version, raw_data, head_start, head_end, body_start, query_string, client_addr
         )
 
+    @memoized
+    def headers(self) -> Headers:
+        return Headers(self._view, self._head_start, self._head_end + 2)
+
+    @memoized
+    def query(self) -> Dict[str, str]:
+        return dict(urllib.parse.parse_qsl(self.query_string))
+
+    @memoized
+    def cookies(self) -> Dict[str, str]:
+        return HttpRequest._parse_cookies(self.headers.get("cookie", ""))
+
+    @memoized
+    def body(self) -> bytes:
+        return self._view[self._body_start:].tobytes()
+
+    @memoized
+    def form(self) -> Dict[str, str]:
+        if not self._has_body() or "application/x-www-form-urlencoded" not in self.headers.get("content-type", ""):
+            return {}
+        return dict(urllib.parse.parse_qsl(str(self._view[self._body_start:], "utf-8")))
+
+    @memoized
+    def json_data(self) -> Optional[dict]:
+        if not self._has_body() or "application/json" not in self.headers.get("content-type", ""):
+            return None
+        try:
+            return json.loads(str(self._view[self._body_start:], "utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+
+    def remaining_time(self) -> Optional[float]:
+        """距请求截止还剩多少秒，耗时操作可据此提前放弃；未设置截止时间时返回 None"""
+
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def _has_body(self) -> bool:
+        return len(self._view) > self._body_start
+
     @staticmethod
     def _parse_cookies(cookie_header: str) -> Dict[str, str]:
         """拆分 Cookie 字符串"""
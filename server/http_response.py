@@ -1,9 +1,27 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+@dataclass
+class FileBody:
+    """由 sendfile 直接从文件发送的包体片段"""
+
+    path: str
+    offset: int
+    count: int
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            return f.read(self.count)
+
+
+Body = Union[bytes, Iterable[bytes], FileBody]
 
 
 def _json_default(value):
@@ -19,19 +37,27 @@ class HttpResponse:
     status_code: int = 200
     reason: str = "OK"
     headers: Dict[str, str] = field(default_factory=dict)
-    body: bytes = b""
+    body: Body = b""
 
     _status_reason = {
         200: "OK",
         201: "Created",
         204: "No Content",
+        206: "Partial Content",
         302: "Found",
+        304: "Not Modified",
         400: "Bad Request",
         401: "Unauthorized",
         403: "Forbidden",
         404: "Not Found",
+        405: "Method Not Allowed",
         409: "Conflict",
+        413: "Payload Too Large",
+        416: "Range Not Satisfiable",
+        429: "Too Many Requests",
+        431: "Request Header Fields Too Large",
         500: "Internal Server Error",
+        503: "Service Unavailable",
     }
 
     @classmethod
@@ -47,15 +73,26 @@ class HttpResponse:
 
     @classmethod
     def json(cls, payload: dict, status: int = 200) -> "HttpResponse":
-        """返回 JSON 响应"""
+        """返回 JSON 响应，成功响应附带由内容哈希得到的强 ETag"""
 
         body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
         headers = {
             "Content-Type": "application/json; charset=utf-8",
             "Content-Length": str(len(body)),
         }
+        if status == 200:
+            headers["ETag"] = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
         return cls(status_code=status, reason=cls._status_reason.get(status, "OK"), headers=headers, body=body)
 
+    @classmethod
+    def stream(
+        cls, chunks: Iterable[bytes], status: int = 200, content_type: str = "text/html; charset=utf-8"
+    ) -> "HttpResponse":
+        """返回以 chunked 编码边生成边发送的响应"""
+
+        headers = {"Content-Type": content_type, "Transfer-Encoding": "chunked"}
+        return cls(status_code=status, reason=cls._status_reason.get(status, "OK"), headers=headers, body=chunks)
+
     @classmethod
     def redirect(cls, location: str) -> "HttpResponse":
         """构造 302 重定向"""
@@ -63,11 +100,82 @@ class HttpResponse:
         headers = {"Location": location, "Content-Length": "0"}
         return cls(status_code=302, reason="Found", headers=headers, body=b"")
 
+    @property
+    def is_streaming(self) -> bool:
+        return not isinstance(self.body, (bytes, bytearray, FileBody))
+
+    @property
+    def is_file(self) -> bool:
+        return isinstance(self.body, FileBody)
+
+    def materialize(self) -> None:
+        """把流式或文件包体收集为 bytes，用于不支持 chunked 的客户端或无法 sendfile 的场景"""
+
+        if self.is_file:
+            self.body = self.body.read()
+            return
+        if not self.is_streaming:
+            return
+        self.body = b"".join(self.body)
+        self.headers.pop("Transfer-Encoding", None)
+        self.headers["Content-Length"] = str(len(self.body))
+
+    def header_bytes(self) -> bytes:
+        """直接拼接字节序列化状态行与头部，状态行和常见头部名取自缓存"""
+
+        headers = self.headers
+        parts = [_status_line(self.status_code, self.reason)]
+        for name, value in headers.items():
+            parts.append(_header_prefix(name))
+            parts.append(value.encode("utf-8"))
+            parts.append(b"\r\n")
+        if "Server" not in headers:
+            parts.append(_SERVER_HEADER)
+        if "Connection" not in headers:
+            parts.append(_CONNECTION_CLOSE)
+        parts.append(b"\r\n")
+        return b"".join(parts)
+
     def to_bytes(self) -> bytes:
         """序列化为符合 HTTP 规范的字节流"""
 
-        self.headers.setdefault("Server", "MiniSocketBlog/0.1")
-        self.headers.setdefault("Connection", "close")
-        response_line = f"HTTP/1.1 {self.status_code} {self.reason}\r\n"
-        header_lines = "".join(f"{k}: {v}\r\n" for k, v in self.headers.items())
-        return (response_line + header_lines + "\r\n").encode("utf-8") + self.body
+        self.materialize()
+        return self.header_bytes() + self.body
+
+    def iter_buffers(self) -> Iterator[List[bytes]]:
+        """按发送顺序产出缓冲区列表，每组可由一次 sendmsg/writelines 发出，头部与包体无需拼接"""
+
+        if self.is_file:
+            self.materialize()
+        if not self.is_streaming:
+            yield [self.header_bytes(), self.body] if self.body else [self.header_bytes()]
+            return
+        yield [self.header_bytes()]
+        for chunk in self.body:
+            if chunk:
+                yield [b"%x\r\n" % len(chunk), chunk, b"\r\n"]
+        yield [b"0\r\n\r\n"]
+
+
+_SERVER_HEADER = b"Server: MiniSocketBlog/0.1\r\n"
+_CONNECTION_CLOSE = b"Connection: close\r\n"
+_status_lines: Dict[Tuple[int, str], bytes] = {}
+_header_prefixes: Dict[str, bytes] = {}
+
+
+def _status_line(status_code: int, reason: str) -> bytes:
+    line = _status_lines.get((status_code, reason))
+    if line is None:
+        line = f"HTTP/1.1 {status_code} {reason}\r\n".encode("latin-1")
+        _status_lines[(status_code, reason)] = line
+    return line
+
+
+def _header_prefix(name: str) -> bytes:
+    prefix = _header_prefixes.get(name)
+    if prefix is None:
+        prefix = f"{name}: ".encode("latin-1")
+        # 头部名集合有限，只在规模可控时缓存
+        if len(_header_prefixes) < 256:
+            _header_prefixes[name] = prefix
+    return prefix
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
 import threading
 import time
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict, Tuple
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -21,6 +26,10 @@ class MetricsCollector:
     def __init__(self, window_seconds: int = 60) -> None:
         self.window_seconds = window_seconds
         self._samples: Deque[MetricSample] = deque()
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._shared_dir: Optional[str] = None
         self._lock = threading.Lock()
 
     def record(self, latency_ms: float, bytes_in: int, bytes_out: int) -> None:
@@ -30,44 +39,165 @@ class MetricsCollector:
             self._samples.append(sample)
             self._trim_locked(now)
 
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increase a cumulative counter such as rejected connections."""
+
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counter(self, name: str) -> float:
+        """Current value of a cumulative counter, 0 if it was never incremented."""
+
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a windowed observation; snapshot reports its avg and max."""
+
+        now = time.time()
+        with self._lock:
+            samples = self._observations.setdefault(name, deque())
+            samples.append((now, value))
+            self._trim_locked(now)
+
+    def register_gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Register a callable that is evaluated on every snapshot."""
+
+        with self._lock:
+            self._gauges[name] = func
+
     def snapshot(self) -> Dict[str, float]:
         now = time.time()
         with self._lock:
             self._trim_locked(now)
-            count = len(self._samples)
-            if count == 0:
-                return {
-                    "window_seconds": self.window_seconds,
-                    "sample_count": 0,
-                    "latency_ms_avg": 0.0,
-                    "latency_ms_max": 0.0,
-                    "latency_ms_min": 0.0,
-                    "rtt_ms_avg": 0.0,
-                    "throughput_kbps": 0.0,
-                    "requests_per_sec": 0.0,
-                }
-            total_latency = sum(s.latency_ms for s in self._samples)
-            total_bytes = sum(s.bytes_out for s in self._samples)
-            latency_max = max(s.latency_ms for s in self._samples)
-            latency_min = min(s.latency_ms for s in self._samples)
-            span = max(self._samples[-1].timestamp - self._samples[0].timestamp, 1e-6)
-            throughput_kbps = (total_bytes / 1024.0) / span
-            rps = count / span
+            result = self._sample_stats_locked()
+            result.update(self._counters)
+            for name, samples in self._observations.items():
+                values = [value for _, value in samples]
+                result[f"{name}_count"] = len(values)
+                result[f"{name}_avg"] = sum(values) / len(values) if values else 0.0
+                result[f"{name}_max"] = max(values) if values else 0.0
+            gauges = list(self._gauges.items())
+        # gauge 回调可能持有其他锁，放在本锁之外执行
+        for name, func in gauges:
+            result[name] = func()
+        return result
+
+    def enable_sharing(self, directory: str, interval: float = 1.0) -> None:
+        """Periodically publish this process's snapshot so sibling workers can aggregate it."""
+
+        os.makedirs(directory, exist_ok=True)
+        self._shared_dir = directory
+        thread = threading.Thread(target=self._publish_loop, args=(interval,), name="metrics-publisher", daemon=True)
+        thread.start()
+
+    def cluster_snapshot(self) -> Dict[str, float]:
+        """Snapshot covering every prefork worker; equals snapshot() in single-process mode."""
+
+        local = self.snapshot()
+        if not self._shared_dir:
+            return local
+        own_file = f"{os.getpid()}.json"
+        snapshots = [local]
+        stale_before = time.time() - self.window_seconds
+        for name in os.listdir(self._shared_dir):
+            if name == own_file or not name.endswith(".json"):
+                continue
+            path = os.path.join(self._shared_dir, name)
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return aggregate_snapshots(snapshots)
+
+    def _publish_loop(self, interval: float) -> None:
+        path = os.path.join(self._shared_dir, f"{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        while True:
+            time.sleep(interval)
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, path)
+            except OSError as exc:  # pragma: no cover - 防御性日志
+                logger.warning("metrics publish failed: %s", exc)
+
+    def _sample_stats_locked(self) -> Dict[str, float]:
+        count = len(self._samples)
+        if count == 0:
             return {
                 "window_seconds": self.window_seconds,
-                "sample_count": count,
-                "latency_ms_avg": total_latency / count,
-                "latency_ms_max": latency_max,
-                "latency_ms_min": latency_min,
-                "rtt_ms_avg": total_latency / count,
-                "throughput_kbps": throughput_kbps,
-                "requests_per_sec": rps,
+                "sample_count": 0,
+                "latency_ms_avg": 0.0,
+                "latency_ms_max": 0.0,
+                "latency_ms_min": 0.0,
+                "rtt_ms_avg": 0.0,
+                "throughput_kbps": 0.0,
+                "requests_per_sec": 0.0,
             }
+        total_latency = sum(s.latency_ms for s in self._samples)
+        total_bytes = sum(s.bytes_out for s in self._samples)
+        latency_max = max(s.latency_ms for s in self._samples)
+        latency_min = min(s.latency_ms for s in self._samples)
+        span = max(self._samples[-1].timestamp - self._samples[0].timestamp, 1e-6)
+        throughput_kbps = (total_bytes / 1024.0) / span
+        rps = count / span
+        return {
+            "window_seconds": self.window_seconds,
+            "sample_count": count,
+            "latency_ms_avg": total_latency / count,
+            "latency_ms_max": latency_max,
+            "latency_ms_min": latency_min,
+            "rtt_ms_avg": total_latency / count,
+            "throughput_kbps": throughput_kbps,
+            "requests_per_sec": rps,
+        }
 
     def _trim_locked(self, now: float) -> None:
         cutoff = now - self.window_seconds
         while self._samples and self._samples[0].timestamp < cutoff:
             self._samples.popleft()
+        for samples in self._observations.values():
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+
+
+def aggregate_snapshots(snapshots: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    """Merge per-process snapshots: sums for counts and rates, weighted means, max of max, min of min."""
+
+    snapshots = list(snapshots)
+    if not snapshots:
+        return {}
+    merged: Dict[str, float] = {}
+    keys: List[str] = list(dict.fromkeys(key for snap in snapshots for key in snap))
+    for key in keys:
+        present = [snap for snap in snapshots if key in snap]
+        if key == "window_seconds":
+            merged[key] = present[0][key]
+        elif key.endswith("_max"):
+            merged[key] = max(snap[key] for snap in present)
+        elif key.endswith("_min"):
+            with_samples = [snap[key] for snap in present if snap.get("sample_count")]
+            merged[key] = min(with_samples) if with_samples else 0.0
+        elif key.endswith("_avg"):
+            weight_key = key[:-4] + "_count"
+            if not all(weight_key in snap for snap in present):
+                weight_key = "sample_count"
+            total_weight = sum(snap.get(weight_key, 0) for snap in present)
+            weighted = sum(snap[key] * snap.get(weight_key, 0) for snap in present)
+            merged[key] = weighted / total_weight if total_weight else 0.0
+        else:
+            merged[key] = sum(snap[key] for snap in present)
+    if merged.get("workers_total"):
+        merged["worker_utilization"] = merged.get("workers_busy", 0) / merged["workers_total"]
+    page_lookups = merged.get("page_cache_hits", 0) + merged.get("page_cache_misses", 0)
+    if page_lookups:
+        merged["page_cache_hit_ratio"] = merged.get("page_cache_hits", 0) / page_lookups
+    merged["process_count"] = len(snapshots)
+    return merged
 
 
 metrics_collector = MetricsCollector(window_seconds=60)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import config
+from .http_request import HttpRequest
+from .http_response import HttpResponse
+from .metrics import metrics_collector
+from .session import session_store
+
+Handler = Callable[[HttpRequest], HttpResponse]
+CacheKey = Tuple[str, str, str]
+
+# 登录用户的页面带有个人信息，只有匿名访问才会写入和命中缓存
+ANONYMOUS = "anonymous"
+
+
+@dataclass
+class CachedPage:
+    """缓存的完整页面"""
+
+    status_code: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes
+    expires_at: float
+
+
+class PageCache:
+    """匿名 GET 页面的整页缓存：按 (路径, 查询串, 登录状态) 索引，LRU 淘汰加 TTL 过期"""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, CachedPage]" = OrderedDict()
+        # 每次失效递增，防止失效前开始渲染的旧页面在失效后写回
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def cached(self, handler: Handler) -> Handler:
+        """包装页面处理器，在注册路由时使用"""
+
+        @wraps(handler)
+        def wrapper(request: HttpRequest) -> HttpResponse:
+            return self.serve(request, handler)
+
+        return wrapper
+
+    def serve(self, request: HttpRequest, handler: Handler) -> HttpResponse:
+        if not config.PAGE_CACHE_ENABLED or request.method != "GET":
+            return handler(request)
+        auth_state = _auth_state(request)
+        if auth_state != ANONYMOUS:
+            return handler(request)
+        key = (request.path, request.query_string, auth_state)
+        page = self.get(key)
+        if page is not None:
+            metrics_collector.incr("page_cache_hits")
+            return HttpResponse(
+                status_code=page.status_code, reason=page.reason, headers=dict(page.headers), body=page.body
+            )
+        metrics_collector.incr("page_cache_misses")
+        with self._lock:
+            generation = self._generation
+        response = handler(request)
+        if response.status_code != 200 or "Set-Cookie" in response.headers or response.is_file:
+            return response
+        # 后续的压缩与连接头处理会修改 response，这里先取一份原始头部
+        page = CachedPage(
+            status_code=response.status_code,
+            reason=response.reason,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name not in ("Transfer-Encoding", "Connection", "Keep-Alive")
+            },
+            body=b"",
+            expires_at=0.0,
+        )
+        if response.is_streaming:
+            # 流式页面照常边渲染边发送，完整发送后才写入缓存
+            response.body = self._tee(key, generation, page, response.body)
+        else:
+            self._store(key, generation, page, response.body)
+        return response
+
+    def get(self, key: CacheKey) -> Optional[CachedPage]:
+        now = time.monotonic()
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                return None
+            if page.expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return page
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """数据变更后调用；给出 path 时只清除该路径的页面，否则清空全部"""
+
+        with self._lock:
+            self._generation += 1
+            if path is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _tee(self, key: CacheKey, generation: int, page: CachedPage, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        collected: List[bytes] = []
+        for chunk in chunks:
+            collected.append(chunk)
+            yield chunk
+        self._store(key, generation, page, b"".join(collected))
+
+    def _store(self, key: CacheKey, generation: int, page: CachedPage, body: bytes) -> None:
+        page.body = body
+        page.headers["Content-Length"] = str(len(body))
+        page.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _auth_state(request: HttpRequest) -> str:
+    session_id = request.cookies.get("session_id")
+    if session_id and session_store.get_user_id(session_id) is not None:
+        return "user"
+    return ANONYMOUS
+
+
+def _hit_ratio() -> float:
+    hits = metrics_collector.counter("page_cache_hits")
+    total = hits + metrics_collector.counter("page_cache_misses")
+    return hits / total if total else 0.0
+
+
+page_cache = PageCache(config.PAGE_CACHE_MAX_ENTRIES, config.PAGE_CACHE_TTL)
+metrics_collector.register_gauge("page_cache_entries", lambda: len(page_cache))
+metrics_collector.register_gauge("page_cache_hit_ratio", _hit_ratio)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import signal
+import socket
+import time
+from typing import Callable, Dict, Protocol
+
+import config
+from .metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+class Startable(Protocol):
+    def start(self) -> None: ...
+
+
+class PreforkSupervisor:
+    """主进程派生并看护 N 个工作进程，各进程通过 SO_REUSEPORT 共享监听端口"""
+
+    def __init__(self, server_factory: Callable[[], Startable], workers: int) -> None:
+        self.server_factory = server_factory
+        self.workers = max(1, workers)
+        self._children: Dict[int, int] = {}
+        self._spawned_at: Dict[int, float] = {}
+        self._running = False
+
+    def start(self) -> None:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("当前平台不支持 SO_REUSEPORT，无法启用多进程模式")
+        shutil.rmtree(config.METRICS_SHARED_DIR, ignore_errors=True)
+        os.makedirs(config.METRICS_SHARED_DIR, exist_ok=True)
+        self._running = True
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logger.info("多进程模式启动: %s 个工作进程", self.workers)
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self._children.pop(pid, None)
+            if slot is None:
+                continue
+            self._remove_metrics_file(pid)
+            if not self._running:
+                continue
+            logger.warning("工作进程 %s 退出 (状态 %s)，重新拉起", pid, status)
+            # 启动即崩溃时稍作等待，避免疯狂重启
+            if time.time() - self._spawned_at.pop(slot, 0) < 1:
+                time.sleep(1)
+            self._spawn(slot)
+        logger.info("所有工作进程已退出")
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                metrics_collector.enable_sharing(config.METRICS_SHARED_DIR, config.METRICS_PUBLISH_INTERVAL)
+                self.server_factory().start()
+            except Exception as exc:  # pragma: no cover - 防御性日志
+                logger.exception("工作进程异常退出: %s", exc)
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._children[pid] = slot
+        self._spawned_at[slot] = time.time()
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._running = False
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    @staticmethod
+    def _remove_metrics_file(pid: int) -> None:
+        try:
+            os.remove(os.path.join(config.METRICS_SHARED_DIR, f"{pid}.json"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import config
+from .metrics import metrics_collector
+
+# (方法, 路径) -> 限流类别；未列出的路径归入 default，静态资源不限流
+ROUTE_CLASSES: Dict[Tuple[str, str], str] = {
+    ("POST", "/api/login"): "auth",
+    ("POST", "/api/register"): "auth",
+    ("GET", "/search"): "search",
+    ("GET", "/api/posts/search"): "search",
+}
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+def classify(raw_data: bytes) -> Optional[str]:
+    """只切分请求行判断限流类别，不做完整解析"""
+
+    line_end = raw_data.find(b"\r\n")
+    parts = raw_data[:line_end if line_end >= 0 else len(raw_data)].split(b" ")
+    if len(parts) != 3:
+        return None
+    method = parts[0].decode("latin-1").upper()
+    path, _, query = parts[1].decode("latin-1").partition("?")
+    if path.startswith("/static/"):
+        return None
+    if path == "/" and query:
+        # 首页带 q/tag 参数时执行的是同样的模糊搜索
+        return "search"
+    return ROUTE_CLASSES.get((method, path), "default")
+
+
+class RateLimiter:
+    """按客户端 IP 与路由类别划分的令牌桶，空闲桶定期清理"""
+
+    def __init__(self, rules: Dict[str, Tuple[float, float]], sweep_interval: float) -> None:
+        self.rules = rules
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+
+    def check(self, client_host: str, raw_data: bytes) -> float:
+        """放行返回 0，否则返回建议的重试等待秒数"""
+
+        if not config.RATE_LIMIT_ENABLED:
+            return 0.0
+        category = classify(raw_data)
+        if category is None:
+            return 0.0
+        rate, burst = self.rules.get(category, self.rules["default"])
+        if rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        key = (client_host, category)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep_locked(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(burst, now)
+            else:
+                bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            retry_after = (1 - bucket.tokens) / rate
+        metrics_collector.incr("rate_limited")
+        metrics_collector.incr(f"rate_limited_{category}")
+        return retry_after
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+    def _sweep_locked(self, now: float) -> None:
+        """删除已经补满的桶，它们与新建的桶等价"""
+
+        for key in list(self._buckets):
+            rate, burst = self.rules.get(key[1], self.rules["default"])
+            bucket = self._buckets[key]
+            if rate <= 0 or bucket.tokens + (now - bucket.updated) * rate >= burst:
+                del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+
+rate_limiter = RateLimiter(config.RATE_LIMIT_RULES, config.RATE_LIMIT_SWEEP_INTERVAL)
+metrics_collector.register_gauge("rate_limit_buckets", lambda: len(rate_limiter))
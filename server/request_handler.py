@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+import math
+from typing import Optional, Tuple
+
+import config
+from repository.db import PoolTimeout
+
+from .compression import apply_encoding_headers, compress_response
+from .http_request import HttpRequest
+from .http_response import HttpResponse
+from .metrics import metrics_collector
+from .router import Router
+from .static_handler import etag_matches, serve_static
+
+logger = logging.getLogger(__name__)
+
+
+def process_request(
+    router: Router, raw_data: bytes, client_ip: str, deadline: Optional[float] = None
+) -> Tuple[Optional[HttpRequest], HttpResponse]:
+    """解析原始请求并交给静态资源或路由处理，两种服务器引擎共用"""
+
+    request: HttpRequest | None = None
+    response: HttpResponse | None = None
+    try:
+        request = HttpRequest.parse(raw_data, client_ip)
+    except ValueError:
+        return None, HttpResponse.text("请求格式错误", status=400, content_type="text/plain; charset=utf-8")
+    request.deadline = deadline
+    if deadline is not None and request.remaining_time() <= 0:
+        # 排队期间已超过截止时间，客户端多半已放弃，不再执行处理器
+        metrics_collector.incr("timeouts_deadline")
+        response = HttpResponse.text("请求处理超时", status=503, content_type="text/plain; charset=utf-8")
+        response.headers["Retry-After"] = "1"
+        return request, response
+    try:
+        if request.path.startswith("/static/"):
+            response = serve_static(request)
+        else:
+            response = router.dispatch(request)
+    except PoolTimeout:
+        # 数据库连接池耗尽与工作线程过载同属暂时性过载，让客户端稍后重试
+        metrics_collector.incr("db_pool_unavailable")
+        response = HttpResponse.text("服务器繁忙，请稍后重试", status=503)
+        response.headers["Retry-After"] = "1"
+        return request, response
+    except Exception as exc:  # pragma: no cover - 防御性日志
+        logger.exception("处理请求出错: %s", exc)
+        response = HttpResponse.text("服务器内部错误", status=500)
+    if response is None:
+        response = HttpResponse.text("服务器内部错误", status=500)
+    if _not_modified(request, response):
+        metrics_collector.incr("not_modified_responses")
+        # 304 须带上与 200 相同的 Vary 与（可能已弱化的）ETag
+        apply_encoding_headers(request, response)
+        return request, _not_modified_response(response)
+    if response.is_streaming and (request is None or request.version.upper() == "HTTP/1.0"):
+        # HTTP/1.0 不支持 chunked 编码，退化为一次性发送
+        response.materialize()
+    return request, compress_response(request, response)
+
+
+def _not_modified(request: HttpRequest, response: HttpResponse) -> bool:
+    """动态响应的条件 GET：If-None-Match 命中当前 ETag 时可返回 304"""
+
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return False
+    etag = response.headers.get("ETag")
+    return bool(etag) and etag_matches(request.headers.get("if-none-match", ""), etag)
+
+
+def _not_modified_response(response: HttpResponse) -> HttpResponse:
+    headers = {name: value for name, value in response.headers.items() if name in ("ETag", "Cache-Control", "Vary")}
+    return HttpResponse(status_code=304, reason="Not Modified", headers=headers, body=b"")
+
+
+def should_keep_alive(request: Optional[HttpRequest], served: int) -> bool:
+    """根据协议版本、Connection 头和单连接请求上限判断是否复用连接"""
+
+    if request is None or served >= config.KEEPALIVE_MAX_REQUESTS:
+        return False
+    connection = request.headers.get("connection", "").lower()
+    if request.version.upper() == "HTTP/1.0":
+        return "keep-alive" in connection
+    return "close" not in connection
+
+
+def apply_connection_headers(response: HttpResponse, keep_alive: bool, served: int) -> None:
+    if keep_alive:
+        response.headers["Connection"] = "keep-alive"
+        response.headers["Keep-Alive"] = (
+            f"timeout={int(config.KEEPALIVE_TIMEOUT)}, max={config.KEEPALIVE_MAX_REQUESTS - served}"
+        )
+    else:
+        response.headers["Connection"] = "close"
+
+
+def error_payload(status: int, message: str) -> bytes:
+    """报文层错误（如 413）的响应，发送后即关闭连接"""
+
+    response = HttpResponse.text(message, status=status, content_type="text/plain; charset=utf-8")
+    response.headers["Connection"] = "close"
+    return response.to_bytes()
+
+
+def overload_payload() -> bytes:
+    """过载时直接写回的 503 响应"""
+
+    response = HttpResponse.text("服务器繁忙，请稍后重试", status=503)
+    response.headers["Retry-After"] = "1"
+    response.headers["Connection"] = "close"
+    return response.to_bytes()
+
+
+def rate_limited_payload(retry_after: float) -> bytes:
+    """触发限流时直接写回的 429 响应"""
+
+    response = HttpResponse.text("请求过于频繁，请稍后重试", status=429, content_type="text/plain; charset=utf-8")
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    response.headers["Connection"] = "close"
+    return response.to_bytes()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import socket
+import time
+from typing import Callable, Optional
+
+import config
+
+CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+
+
+class FramingError(Exception):
+    """请求报文不合法或超出限制，status 为应返回的状态码"""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class RequestFramer:
+    """增量切分字节流中的 HTTP 请求，支持 Content-Length、chunked 与流水线"""
+
+    def __init__(self, max_header_size: int | None = None, max_body_size: int | None = None) -> None:
+        self.max_header_size = max_header_size or config.MAX_HEADER_SIZE
+        self.max_body_size = max_body_size or config.MAX_REQUEST_SIZE
+        self._buffer = bytearray()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._head_end = -1
+        self._scan_from = 0
+        self._content_length = 0
+        self._chunked = False
+        self._chunk_pos = 0
+        self._body = bytearray()
+        self.expect_continue = False
+
+    def feed(self, data) -> None:
+        self._buffer += data
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._buffer)
+
+    @property
+    def phase(self) -> str:
+        """idle: 缓冲区为空；header: 正在接收请求头；body: 请求头已完整，正在接收包体"""
+
+        if self._head_end >= 0:
+            return "body"
+        return "header" if self._buffer else "idle"
+
+    def next_request(self) -> Optional[bytes]:
+        """缓冲区中存在完整请求时返回其原始字节（chunked 包体已解码），否则返回 None"""
+
+        if self._head_end < 0 and not self._parse_head():
+            return None
+        body_start = self._head_end + 4
+        if self._chunked:
+            if not self._parse_chunks(body_start):
+                return None
+            end = self._chunk_pos
+            body = bytes(self._body)
+        else:
+            end = body_start + self._content_length
+            if len(self._buffer) < end:
+                return None
+            body = bytes(self._buffer[body_start:end])
+        raw = bytes(self._buffer[:body_start]) + body
+        del self._buffer[:end]
+        self._reset()
+        return raw
+
+    def _parse_head(self) -> bool:
+        # 允许请求之间存在多余的空行
+        while self._buffer[:2] == b"\r\n":
+            del self._buffer[:2]
+        head_end = self._buffer.find(b"\r\n\r\n", self._scan_from)
+        if head_end < 0:
+            if len(self._buffer) > self.max_header_size:
+                raise FramingError(431, "请求头过大")
+            self._scan_from = max(len(self._buffer) - 3, 0)
+            return False
+        if head_end > self.max_header_size:
+            raise FramingError(431, "请求头过大")
+        expect_continue = False
+        for line in bytes(self._buffer[:head_end]).split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                try:
+                    self._content_length = int(value)
+                except ValueError:
+                    raise FramingError(400, "Content-Length 不合法") from None
+                if self._content_length < 0:
+                    raise FramingError(400, "Content-Length 不合法")
+            elif name == b"transfer-encoding":
+                self._chunked = b"chunked" in value
+            elif name == b"expect":
+                expect_continue = value == b"100-continue"
+        if not self._chunked and self._content_length > self.max_body_size:
+            raise FramingError(413, "请求体过大")
+        self._head_end = head_end
+        self._chunk_pos = head_end + 4
+        self.expect_continue = expect_continue
+        return True
+
+    def _parse_chunks(self, body_start: int) -> bool:
+        while True:
+            line_end = self._buffer.find(b"\r\n", self._chunk_pos)
+            if line_end < 0:
+                if len(self._buffer) - self._chunk_pos > 1024:
+                    raise FramingError(400, "chunk 长度行不合法")
+                return False
+            size_token = bytes(self._buffer[self._chunk_pos:line_end]).split(b";", 1)[0].strip()
+            try:
+                size = int(size_token, 16)
+            except ValueError:
+                raise FramingError(400, "chunk 长度行不合法") from None
+            if size == 0:
+                trailer_end = self._buffer.find(b"\r\n\r\n", line_end)
+                if trailer_end < 0:
+                    return False
+                self._chunk_pos = trailer_end + 4
+                return True
+            if len(self._body) + size > self.max_body_size:
+                raise FramingError(413, "请求体过大")
+            data_start = line_end + 2
+            data_end = data_start + size
+            if len(self._buffer) < data_end + 2:
+                return False
+            self._body += self._buffer[data_start:data_end]
+            # 已解码的 chunk 立即从缓冲区移除，避免同时持有两份包体
+            del self._buffer[body_start:data_end + 2]
+            self._chunk_pos = body_start
+
+
+class SocketRequestReader:
+    """在阻塞套接字上逐个读取完整请求，复用同一块接收缓冲区"""
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        buffer_size: int | None = None,
+        on_phase: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._sock = sock
+        self._recv_buffer = bytearray(buffer_size or config.RECV_BUFFER_SIZE)
+        self._recv_view = memoryview(self._recv_buffer)
+        self._on_phase = on_phase
+        self.framer = RequestFramer()
+        # 最近返回的请求收到第一个字节的时间（monotonic），用于计算请求截止时间
+        self.request_started = 0.0
+
+    def read_request(self) -> Optional[bytes]:
+        """返回下一个请求的原始字节；对端关闭连接时返回 None"""
+
+        phase = None
+        started = None
+        while True:
+            raw = self.framer.next_request()
+            if raw is not None:
+                self.request_started = started or time.monotonic()
+                return raw
+            if self.framer.expect_continue:
+                self.framer.expect_continue = False
+                self._sock.sendall(CONTINUE_RESPONSE)
+            current = self.framer.phase
+            if current != phase:
+                phase = current
+                if self._on_phase is not None:
+                    self._on_phase(phase)
+            received = self._sock.recv_into(self._recv_buffer)
+            if not received:
+                return None
+            if started is None and phase == "idle":
+                started = time.monotonic()
+            self.framer.feed(self._recv_view[:received])
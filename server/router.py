@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import re
-from typing import Any, Callable, Dict, List, Optional, Tuple
+import contextlib
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Set, Tuple
 
 from .http_request import HttpRequest
 from .http_response import HttpResponse
@@ -9,35 +9,148 @@ from .http_response import HttpResponse
 Handler = Callable[[HttpRequest], HttpResponse]
 
 
+def _convert_str(segment: str) -> Optional[str]:
+    return segment or None
+
+
+def _convert_int(segment: str) -> Optional[int]:
+    if segment.isascii() and segment.isdigit():
+        return int(segment)
+    return None
+
+
+# 转换失败返回 None，表示该段不匹配
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "str": _convert_str,
+    "int": _convert_int,
+}
+
+
+class _Node:
+    """路径前缀树节点，每个节点按方法保存处理器"""
+
+    __slots__ = ("children", "param", "param_name", "converter", "handlers")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.param: Optional[_Node] = None
+        self.param_name = ""
+        self.converter: Callable[[str], Any] = _convert_str
+        self.handlers: Dict[str, Handler] = {}
+
+
 class Router:
-    """最简路由器，支持路径参数"""
+    """路由器：静态路径查哈希表，带参数的路径走分段前缀树"""
 
     def __init__(self) -> None:
-        self._routes: List[Tuple[str, re.Pattern[str], Handler]] = []
+        self._static: Dict[str, Dict[str, Handler]] = {}
+        self._root = _Node()
+        self._routes: List[Tuple[str, str, Handler]] = []
+        self._scopes: List[Callable[[], ContextManager]] = []
 
     def add_route(self, method: str, pattern: str, handler: Handler) -> None:
-        """注册路由，pattern 使用 {id} 形式定义参数"""
+        """注册路由，pattern 使用 {id} 或 {id:int} 形式定义参数"""
 
-        regex_pattern = re.sub(r"{([^/]+)}", r"(?P<\1>[^/]+)", pattern)
-        compiled = re.compile(f"^{regex_pattern}$")
-        self._routes.append((method.upper(), compiled, handler))
+        method = method.upper()
+        self._routes.append((method, pattern, handler))
+        if "{" not in pattern:
+            self._static.setdefault(pattern, {})[method] = handler
+            return
+        node = self._root
+        for segment in pattern[1:].split("/"):
+            if segment.startswith("{") and segment.endswith("}"):
+                name, _, converter_name = segment[1:-1].partition(":")
+                converter = CONVERTERS[converter_name or "str"]
+                if node.param is None:
+                    node.param = _Node()
+                    node.param.param_name = name
+                    node.param.converter = converter
+                elif node.param.param_name != name or node.param.converter is not converter:
+                    raise ValueError(f"路由参数冲突: {pattern}")
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.handlers[method] = handler
 
-    def resolve(self, request: HttpRequest) -> Tuple[Optional[Handler], Dict[str, str]]:
+    def add_scope(self, factory: Callable[[], ContextManager]) -> None:
+        """注册包裹每次处理器调用的上下文，如请求级数据库会话"""
+
+        self._scopes.append(factory)
+
+    @property
+    def routes(self) -> List[Tuple[str, str, Handler]]:
+        return list(self._routes)
+
+    def resolve(self, request: HttpRequest) -> Tuple[Optional[Handler], Dict[str, Any]]:
         """匹配路由并返回处理器与路径变量"""
 
-        for method, pattern, handler in self._routes:
-            if method != request.method:
-                continue
-            match = pattern.match(request.path)
-            if match:
-                request.path_params = match.groupdict()
-                return handler, match.groupdict()
-        return None, {}
+        handler, params = self._find(request.method, request.path)
+        if handler is not None:
+            request.path_params = params
+        return handler, params
+
+    def allowed_methods(self, path: str) -> Set[str]:
+        """路径存在但方法不匹配时，用于 405 的 Allow 头"""
+
+        allowed: Set[str] = set(self._static.get(path, {}))
+        self._walk(self._root, path[1:].split("/"), 0, {}, None, allowed)
+        return allowed
 
     def dispatch(self, request: HttpRequest) -> HttpResponse:
         """根据请求分发到具体处理函数"""
 
         handler, _ = self.resolve(request)
         if handler is None:
+            allowed = self.allowed_methods(request.path)
+            if allowed:
+                response = HttpResponse.text("请求方法不被允许", status=405)
+                response.headers["Allow"] = ", ".join(sorted(allowed))
+                return response
             return HttpResponse.text("未找到资源", status=404)
-        return handler(request)
+        if not self._scopes:
+            return handler(request)
+        with contextlib.ExitStack() as stack:
+            for factory in self._scopes:
+                stack.enter_context(factory())
+            return handler(request)
+
+    def _find(self, method: str, path: str) -> Tuple[Optional[Handler], Dict[str, Any]]:
+        handlers = self._static.get(path)
+        if handlers is not None and method in handlers:
+            return handlers[method], {}
+        if not path.startswith("/"):
+            return None, {}
+        return self._walk(self._root, path[1:].split("/"), 0, {}, method, None)
+
+    def _walk(
+        self,
+        node: _Node,
+        segments: List[str],
+        index: int,
+        params: Dict[str, Any],
+        method: Optional[str],
+        allowed: Optional[Set[str]],
+    ) -> Tuple[Optional[Handler], Dict[str, Any]]:
+        """深度优先匹配，静态子节点优先于参数节点；allowed 非空时收集所有可用方法"""
+
+        if index == len(segments):
+            if allowed is not None:
+                allowed.update(node.handlers)
+            if method is not None and method in node.handlers:
+                return node.handlers[method], params
+            return None, {}
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            handler, found = self._walk(child, segments, index + 1, params, method, allowed)
+            if handler is not None:
+                return handler, found
+        if node.param is not None:
+            value = node.param.converter(segment)
+            if value is not None:
+                handler, found = self._walk(
+                    node.param, segments, index + 1, {**params, node.param.param_name: value}, method, allowed
+                )
+                if handler is not None:
+                    return handler, found
+        return None, {}
@@ -1,19 +1,233 @@
+from __future__ import annotations
+
 import mimetypes
 import os
+import stat as stat_module
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
 
 import config
-from .http_response import HttpResponse
+from .assets import IMMUTABLE_CACHE_CONTROL, FingerprintedAsset, asset_manifest
+from .compression import apply_encoding_headers, compress_body, negotiate_encoding
+from .http_request import HttpRequest
+from .http_response import FileBody, HttpResponse
 
 
-def serve_static(path: str) -> HttpResponse:
-    """根据 /static/xxx 的路径返回文件内容"""
+@dataclass
+class StaticAsset:
+    """静态文件的元信息，小文件同时缓存内容及各编码的压缩结果"""
 
-    relative_path = path.replace("/static/", "", 1)
-    file_path = os.path.join(config.STATIC_ROOT, relative_path)
-    if not os.path.isfile(file_path):
+    file_path: str
+    mtime_ns: int
+    size: int
+    content_type: str
+    etag: str
+    last_modified: str
+    data: Optional[bytes]
+    checked_at: float
+    # 编码 -> 压缩后的包体，不值得压缩时为 None；文件变化后整个 StaticAsset 被替换
+    encoded: Dict[str, Optional[bytes]] = field(default_factory=dict)
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+_cache: Dict[str, StaticAsset] = {}
+_cache_lock = threading.Lock()
+
+
+def serve_static(request: HttpRequest) -> HttpResponse:
+    """根据 /static/xxx 的路径返回文件内容，支持条件请求与 Range"""
+
+    fingerprinted = asset_manifest.lookup(request.path.replace("/static/", "", 1))
+    if fingerprinted is not None:
+        return _serve_fingerprinted(request, fingerprinted)
+    file_path = _resolve(request.path)
+    asset = _lookup(file_path) if file_path else None
+    if asset is None:
         return HttpResponse.text("静态资源未找到", status=404)
-    with open(file_path, "rb") as f:
-        data = f.read()
-    content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-    headers = {"Content-Type": content_type, "Content-Length": str(len(data))}
-    return HttpResponse(status_code=200, reason="OK", headers=headers, body=data)
+    headers = {
+        "Content-Type": asset.content_type,
+        "ETag": asset.etag,
+        "Last-Modified": asset.last_modified,
+        "Cache-Control": f"public, max-age={config.STATIC_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+    if _not_modified(request, asset):
+        response = HttpResponse(status_code=304, reason="Not Modified", headers=headers, body=b"")
+        if asset.data is not None:
+            # 与 _serve_cached 可能压缩过的 200 携带相同的 Vary 与 ETag
+            apply_encoding_headers(request, response)
+        return response
+
+    offset, count = 0, asset.size
+    status = 200
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request, asset):
+        try:
+            byte_range = _parse_range(range_header, asset.size)
+        except _RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{asset.size}"
+            headers["Content-Length"] = "0"
+            return HttpResponse(status_code=416, reason="Range Not Satisfiable", headers=headers, body=b"")
+        if byte_range is not None:
+            offset, end = byte_range
+            count = end - offset + 1
+            status = 206
+            headers["Content-Range"] = f"bytes {offset}-{end}/{asset.size}"
+    headers["Content-Length"] = str(count)
+    if asset.data is not None and status == 200:
+        return _serve_cached(request, asset, headers)
+    if asset.data is not None:
+        body = asset.data[offset:offset + count]
+    else:
+        # 大文件不进内存，交给服务器用 sendfile 零拷贝发送
+        body = FileBody(asset.file_path, offset, count)
+    return HttpResponse(status_code=status, reason=HttpResponse._status_reason[status], headers=headers, body=body)
+
+
+def _serve_cached(request: HttpRequest, asset: StaticAsset, headers: Dict[str, str]) -> HttpResponse:
+    """小文件的完整响应，压缩结果随文件内容缓存，不必每次请求重新压缩"""
+
+    response = HttpResponse(status_code=200, reason="OK", headers=headers, body=asset.data)
+    encoding = apply_encoding_headers(request, response)
+    if encoding is None:
+        return response
+    if encoding not in asset.encoded:
+        asset.encoded[encoding] = compress_body(asset.data, encoding)
+    compressed = asset.encoded[encoding]
+    if compressed is not None:
+        response.body = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _serve_fingerprinted(request: HttpRequest, asset: FingerprintedAsset) -> HttpResponse:
+    """带哈希的文件名内容永不变化，可让浏览器永久缓存"""
+
+    headers = {
+        "Content-Type": asset.content_type,
+        "ETag": asset.etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+    }
+    body = asset.data
+    if asset.gzip_data is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if negotiate_encoding(request.headers.get("accept-encoding", "")) == "gzip":
+            body = asset.gzip_data
+            headers["ETag"] = asset.gzip_etag
+            headers["Content-Encoding"] = "gzip"
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return HttpResponse(status_code=304, reason="Not Modified", headers=headers, body=b"")
+    headers["Content-Length"] = str(len(body))
+    return HttpResponse(status_code=200, reason="OK", headers=headers, body=body)
+
+
+def _resolve(path: str) -> Optional[str]:
+    relative_path = path.replace("/static/", "", 1)
+    root = os.path.realpath(config.STATIC_ROOT)
+    file_path = os.path.realpath(os.path.join(root, relative_path))
+    # 拒绝 ../ 跳出静态目录
+    if not file_path.startswith(root + os.sep):
+        return None
+    return file_path
+
+
+def _lookup(file_path: str) -> Optional[StaticAsset]:
+    """读取缓存的文件信息，每隔 STATIC_CHECK_INTERVAL 秒才重新 stat 一次"""
+
+    now = time.monotonic()
+    with _cache_lock:
+        asset = _cache.get(file_path)
+    if asset is not None and now - asset.checked_at < config.STATIC_CHECK_INTERVAL:
+        return asset
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        stat = None
+    if stat is None or not stat_module.S_ISREG(stat.st_mode):
+        with _cache_lock:
+            _cache.pop(file_path, None)
+        return None
+    if asset is not None and asset.mtime_ns == stat.st_mtime_ns and asset.size == stat.st_size:
+        asset.checked_at = now
+        return asset
+    data = None
+    if stat.st_size <= config.STATIC_CACHE_MAX_FILE:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    asset = StaticAsset(
+        file_path=file_path,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        content_type=mimetypes.guess_type(file_path)[0] or "application/octet-stream",
+        etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        data=data,
+        checked_at=now,
+    )
+    with _cache_lock:
+        _cache[file_path] = asset
+    return asset
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """判断 If-None-Match 是否命中，按弱比较处理 W/ 前缀"""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((item[2:] if item.startswith("W/") else item) == bare for item in candidates)
+
+
+def _not_modified(request: HttpRequest, asset: StaticAsset) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, asset.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(asset.mtime_ns / 1e9) <= since
+    return False
+
+
+def _if_range_matches(request: HttpRequest, asset: StaticAsset) -> bool:
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    return if_range.strip() in (asset.etag, asset.last_modified)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """解析单段 bytes Range；多段或格式不支持时返回 None（按完整响应处理）"""
+
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise _RangeNotSatisfiable(range_header)
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise _RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
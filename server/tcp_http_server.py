@@ -1,64 +1,184 @@
 from __future__ import annotations
 
+import contextlib
 import logging
 import socket
-import threading
 import time
-from typing import Callable
+from typing import List
 
 import config
-from .http_request import HttpRequest
 from .http_response import HttpResponse
-from .router import Router
-from .static_handler import serve_static
 from .metrics import metrics_collector
+from .rate_limit import rate_limiter
+from .request_handler import (
+    apply_connection_headers,
+    error_payload,
+    overload_payload,
+    process_request,
+    rate_limited_payload,
+    should_keep_alive,
+)
+from .request_reader import FramingError, SocketRequestReader
+from .router import Router
+from .timeouts import PHASE_TIMEOUTS, ConnectionReaper
+from .worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+_SENDFILE_CHUNK = 1 << 20
+
 
 class TcpHttpServer:
     """使用原生 TCP Socket 的迷你 HTTP 服务器"""
 
-    def __init__(self, host: str, port: int, router: Router) -> None:
+    def __init__(self, host: str, port: int, router: Router, reuse_port: bool = False) -> None:
         self.host = host
         self.port = port
         self.router = router
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._pool = WorkerPool(self._handle_client, config.WORKER_THREADS, config.CONNECTION_QUEUE_SIZE)
+        self._reaper = ConnectionReaper(config.REAPER_INTERVAL)
+        self._overload_payload = overload_payload()
 
     def start(self) -> None:
         self._sock.bind((self.host, self.port))
         self._sock.listen(128)
-        logger.info("服务器启动: %s:%s", self.host, self.port)
+        self._pool.start()
+        self._reaper.start()
+        logger.info(
+            "服务器启动: %s:%s (工作线程 %s, 连接队列 %s)",
+            self.host,
+            self.port,
+            self._pool.size,
+            config.CONNECTION_QUEUE_SIZE,
+        )
         while True:
             client_socket, addr = self._sock.accept()
-            thread = threading.Thread(target=self._handle_client, args=(client_socket, addr), daemon=True)
-            thread.start()
+            if not self._pool.submit(client_socket, addr):
+                self._reject(client_socket)
+
+    def _reject(self, client_socket: socket.socket) -> None:
+        """队列已满时在 accept 线程直接返回 503，不占用工作线程"""
+
+        metrics_collector.incr("rejected_connections")
+        try:
+            client_socket.setblocking(False)
+            client_socket.send(self._overload_payload)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
 
     def _handle_client(self, client_socket: socket.socket, addr) -> None:
         client_ip = f"{addr[0]}:{addr[1]}"
+        reader = SocketRequestReader(client_socket, on_phase=lambda phase: self._reaper.arm(client_socket, phase))
+        served = 0
+        # 各阶段的截止时间由 reaper 执行，套接字超时只作为兜底
+        client_socket.settimeout(max(PHASE_TIMEOUTS.values()))
+        try:
+            while True:
+                try:
+                    raw_data = reader.read_request()
+                except FramingError as exc:
+                    metrics_collector.incr(f"rejected_{exc.status}")
+                    with contextlib.suppress(OSError):
+                        client_socket.sendall(error_payload(exc.status, str(exc)))
+                    break
+                except OSError:
+                    # 空闲超时或对端重置，直接结束连接
+                    break
+                if raw_data is None:
+                    break
+                served += 1
+                retry_after = rate_limiter.check(addr[0], raw_data)
+                if retry_after:
+                    with contextlib.suppress(OSError):
+                        client_socket.sendall(rate_limited_payload(retry_after))
+                    break
+                deadline = reader.request_started + config.REQUEST_DEADLINE
+                try:
+                    keep_alive = self._serve_request(client_socket, raw_data, client_ip, served, deadline)
+                except OSError:
+                    break
+                if not keep_alive:
+                    break
+        finally:
+            self._reaper.disarm(client_socket)
+            client_socket.close()
+            metrics_collector.incr("connections_closed")
+            metrics_collector.observe("requests_per_connection", served)
+
+    def _serve_request(
+        self, client_socket: socket.socket, raw_data: bytes, client_ip: str, served: int, deadline: float
+    ) -> bool:
+        """处理单个请求并写回响应，返回是否保持连接"""
+
         start_time = time.perf_counter()
-        raw_data = b""
-        response: HttpResponse | None = None
+        # 处理器执行时间不由 reaper 限制，处理器可自行查询 request.remaining_time()
+        self._reaper.disarm(client_socket)
+        request, response = process_request(self.router, raw_data, client_ip, deadline)
+        # 有连接在排队时优先让出工作线程，避免空闲长连接饿死新连接
+        keep_alive = should_keep_alive(request, served) and self._pool.queue_depth() == 0
+        apply_connection_headers(response, keep_alive, served)
+        bytes_out = 0
         try:
-            raw_data = client_socket.recv(config.MAX_REQUEST_SIZE)
-            if not raw_data:
-                return
-            request = HttpRequest.parse(raw_data, client_ip)
-            if request.path.startswith("/static/"):
-                response = serve_static(request.path)
+            if response.is_file:
+                bytes_out = self._send_file(client_socket, response)
             else:
-                response = self.router.dispatch(request)
-        except Exception as exc:  # pragma: no cover - 防御性日志
-            logger.exception("处理请求出错: %s", exc)
-            response = HttpResponse.text("服务器内部错误", status=500)
+                for buffers in response.iter_buffers():
+                    self._reaper.arm(client_socket, "write")
+                    bytes_out += self._send_buffers(client_socket, buffers)
+        except OSError:
+            raise
+        except Exception as exc:
+            # 流式包体在头部发出后才失败，只能中断连接
+            logger.exception("生成响应包体出错: %s", exc)
+            keep_alive = False
         finally:
-            if response is None:
-                response = HttpResponse.text("服务器内部错误", status=500)
-            payload = response.to_bytes()
-            try:
-                client_socket.sendall(payload)
-            finally:
-                client_socket.close()
             duration_ms = (time.perf_counter() - start_time) * 1000
-            metrics_collector.record(duration_ms, len(raw_data), len(payload))
+            metrics_collector.record(duration_ms, len(raw_data), bytes_out)
+        return keep_alive
+
+    @staticmethod
+    def _send_buffers(client_socket: socket.socket, buffers: List[bytes]) -> int:
+        """用 sendmsg 把多段缓冲区一次写出（writev），并处理部分发送"""
+
+        total = sum(len(buffer) for buffer in buffers)
+        if len(buffers) == 1:
+            client_socket.sendall(buffers[0])
+            return total
+        if not hasattr(client_socket, "sendmsg"):
+            client_socket.sendall(b"".join(buffers))
+            return total
+        views = [memoryview(buffer) for buffer in buffers if buffer]
+        while views:
+            sent = client_socket.sendmsg(views)
+            while sent:
+                if sent >= len(views[0]):
+                    sent -= len(views.pop(0))
+                else:
+                    views[0] = views[0][sent:]
+                    sent = 0
+        return total
+
+    def _send_file(self, client_socket: socket.socket, response: HttpResponse) -> int:
+        """先发头部，再用 sendfile 把文件片段直接从内核拷贝到套接字"""
+
+        self._reaper.arm(client_socket, "write")
+        header = response.header_bytes()
+        client_socket.sendall(header)
+        file_body = response.body
+        sent = 0
+        with open(file_body.path, "rb") as f:
+            # 分段发送，每段重新计时：大文件不受写超时限制，停止读取的客户端仍会被回收
+            while sent < file_body.count:
+                self._reaper.arm(client_socket, "write")
+                count = min(_SENDFILE_CHUNK, file_body.count - sent)
+                written = client_socket.sendfile(f, file_body.offset + sent, count)
+                if not written:
+                    break
+                sent += written
+        return len(header) + sent
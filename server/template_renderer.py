@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 import config
+from .assets import asset_manifest
 
 _env = Environment(
     loader=FileSystemLoader(config.TEMPLATE_ROOT),
     autoescape=select_autoescape(["html", "xml"]),
 )
+_env.globals["asset_url"] = asset_manifest.url_for
 
 
 def render(template_name: str, context: Dict[str, Any]) -> str:
@@ -18,3 +20,25 @@ def render(template_name: str, context: Dict[str, Any]) -> str:
 
     template = _env.get_template(template_name)
     return template.render(**context)
+
+
+def render_stream(template_name: str, context: Dict[str, Any]) -> Iterator[bytes]:
+    """以 Jinja generate() 流式渲染，按 STREAM_CHUNK_SIZE 聚合后产出字节块"""
+
+    template = _env.get_template(template_name)
+
+    def _chunks() -> Iterator[bytes]:
+        buffer = []
+        size = 0
+        for piece in template.generate(**context):
+            data = piece.encode("utf-8")
+            buffer.append(data)
+            size += len(data)
+            if size >= config.STREAM_CHUNK_SIZE:
+                yield b"".join(buffer)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield b"".join(buffer)
+
+    return _chunks()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Tuple
+
+import config
+from .metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# 连接各阶段允许停留的最长时间：idle 为长连接等待下一个请求，header/body 从该阶段第一个字节起算，
+# write 为发送单组缓冲区或一段文件的时间
+PHASE_TIMEOUTS: Dict[str, float] = {
+    "idle": config.KEEPALIVE_TIMEOUT,
+    "header": config.HEADER_TIMEOUT,
+    "body": config.BODY_TIMEOUT,
+    "write": config.WRITE_TIMEOUT,
+}
+
+
+class ConnectionReaper:
+    """后台线程定期检查各连接当前阶段的截止时间，超时即关闭套接字，阻塞在 recv/send 上的工作线程随之返回"""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._tracked: Dict[int, Tuple[socket.socket, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        thread = threading.Thread(target=self._reap_loop, name="connection-reaper", daemon=True)
+        thread.start()
+        metrics_collector.register_gauge("tracked_connections", self.tracked)
+
+    def arm(self, sock: socket.socket, phase: str) -> None:
+        """进入新阶段时调用，按该阶段的超时重新计算截止时间"""
+
+        deadline = time.monotonic() + PHASE_TIMEOUTS[phase]
+        with self._lock:
+            self._tracked[id(sock)] = (sock, phase, deadline)
+
+    def disarm(self, sock: socket.socket) -> None:
+        """处理器执行期间与连接关闭后不再计时"""
+
+        with self._lock:
+            self._tracked.pop(id(sock), None)
+
+    def tracked(self) -> int:
+        with self._lock:
+            return len(self._tracked)
+
+    def _reap_loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                expired = [key for key, (_, _, deadline) in self._tracked.items() if deadline <= now]
+                stalled = [self._tracked.pop(key) for key in expired]
+            for sock, phase, _ in stalled:
+                metrics_collector.incr(f"timeouts_{phase}")
+                if phase != "idle":
+                    logger.info("关闭停滞连接 (%s 阶段超时)", phase)
+                # shutdown 会唤醒阻塞中的 recv/send，实际 close 仍由工作线程完成
+                with contextlib.suppress(OSError):
+                    sock.shutdown(socket.SHUT_RDWR)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import queue
+import socket
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from .metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+ConnectionHandler = Callable[[socket.socket, Any], None]
+
+
+class WorkerPool:
+    """固定大小的工作线程池，由有界连接队列供给"""
+
+    def __init__(self, handler: ConnectionHandler, size: int, queue_size: int) -> None:
+        self.size = max(1, size)
+        self._handler = handler
+        self._queue: "queue.Queue[Optional[Tuple[socket.socket, Any, float]]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+
+    def start(self) -> None:
+        for index in range(self.size):
+            thread = threading.Thread(target=self._worker_loop, name=f"http-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        metrics_collector.register_gauge("queue_depth", self.queue_depth)
+        metrics_collector.register_gauge("workers_total", lambda: self.size)
+        metrics_collector.register_gauge("workers_busy", self.busy_workers)
+        metrics_collector.register_gauge("worker_utilization", self.utilization)
+
+    def submit(self, client_socket: socket.socket, addr) -> bool:
+        """尝试把连接放入队列，队列已满时返回 False"""
+
+        try:
+            self._queue.put_nowait((client_socket, addr, time.perf_counter()))
+        except queue.Full:
+            return False
+        return True
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def busy_workers(self) -> int:
+        return self._busy
+
+    def utilization(self) -> float:
+        return self._busy / self.size
+
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            client_socket, addr, enqueued_at = item
+            metrics_collector.observe("queue_wait_ms", (time.perf_counter() - enqueued_at) * 1000)
+            with self._busy_lock:
+                self._busy += 1
+            try:
+                self._handler(client_socket, addr)
+            except Exception as exc:  # pragma: no cover - 防御性日志
+                logger.exception("工作线程处理连接出错: %s", exc)
+            finally:
+                with self._busy_lock:
+                    self._busy -= 1
@@ -25,4 +25,4 @@ def login(username: str, password: str) -> str | None:
 
 
 def get_user(user_id: int):
-    return user_repo.find_by_id(user_id)
+    return user_repo.users_by_id.load(user_id)
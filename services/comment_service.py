@@ -1,9 +1,41 @@
-from repository import comment_repo
+from repository import comment_repo, post_repo
+from services import events
 
 
 def add_comment(post_id: int, user_id: int, body: str, parent_id: int | None):
-    return comment_repo.create_comment(post_id, user_id, body, parent_id)
+    comment_id = comment_repo.create_comment(post_id, user_id, body, parent_id)
+    if comment_id is not None:
+        post_repo.posts_by_id.clear(post_id)
+        # 评论数同时展示在列表页和详情页
+        events.content_changed()
+    return comment_id
 
 
-def list_comments(post_id: int):
-    return comment_repo.list_by_post(post_id)
+def list_threads(post_id: int, limit: int = 20, after=None):
+    """顶层评论，每条带 reply_count，回复由 list_replies 按需加载"""
+
+    return comment_repo.list_threads(post_id, limit, after)
+
+
+def list_replies(post_id: int, root_id: int, limit: int = 20, after=None):
+    return comment_repo.list_replies(post_id, root_id, limit, after)
+
+
+def build_tree(comments: list) -> list:
+    """按 parent_id 把正序的评论组装成树，一次遍历 O(n)
+
+    父评论不在本批中的（楼层的顶层评论或上一页的回复）作为返回列表的根节点，客户端按 parent_id 接续。
+    """
+
+    nodes = {}
+    roots = []
+    for comment in comments:
+        node = dict(comment, replies=[])
+        nodes[node["id"]] = node
+        # 正序排列保证父评论先于子评论出现
+        parent = nodes.get(node["parent_id"])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["replies"].append(node)
+    return roots
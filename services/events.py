@@ -0,0 +1,15 @@
+from typing import Callable, List
+
+# 内容变更的订阅方（如页面缓存），由入口模块注册，服务层不依赖 HTTP 层
+_content_listeners: List[Callable[[], None]] = []
+
+
+def on_content_changed(listener: Callable[[], None]) -> None:
+    _content_listeners.append(listener)
+
+
+def content_changed() -> None:
+    """文章、评论或计数变化后调用，通知全部订阅方"""
+
+    for listener in _content_listeners:
+        listener()
@@ -5,9 +5,9 @@ def send(sender_id: int, receiver_id: int, subject: str, body: str):
     return message_repo.send_message(sender_id, receiver_id, subject, body)
 
 
-def inbox(user_id: int):
-    return message_repo.list_inbox(user_id)
+def inbox(user_id: int, limit: int = 20, before=None):
+    return message_repo.list_inbox(user_id, limit, before)
 
 
-def outbox(user_id: int):
-    return message_repo.list_outbox(user_id)
+def outbox(user_id: int, limit: int = 20, before=None):
+    return message_repo.list_outbox(user_id, limit, before)
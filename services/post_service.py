@@ -1,5 +1,11 @@
-from repository import post_repo, subscription_repo
-from services import reaction_service
+import threading
+import time
+
+import config
+from repository import post_repo, tag_repo
+from repository.db import transaction
+from services import events, reaction_service, subscription_service
+from services.search_index import search_index, tokenize
 
 
 def _normalize_post(record: dict | None) -> dict | None:
@@ -7,15 +13,53 @@ def _normalize_post(record: dict | None) -> dict | None:
         return None
     record["like_count"] = int(record.get("like_count") or 0)
     record["favorite_count"] = int(record.get("favorite_count") or 0)
+    record["comment_count"] = int(record.get("comment_count") or 0)
     return record
 
 
+# 分类列表缓存：只保存前 _CATEGORY_CACHE_SIZE 个热门标签，按需切片
+_CATEGORY_CACHE_SIZE = 50
+_category_cache: list | None = None
+_category_cache_at = 0.0
+_category_lock = threading.Lock()
+
+
+def _normalize_tags(tags: str | None) -> tuple[list[str], str | None]:
+    """拆分标签，返回 (标签列表, 写回 posts.tags 的展示串)"""
+
+    names = tag_repo.split_tags(tags)
+    return names, ",".join(names) or None
+
+
+def _invalidate_categories() -> None:
+    global _category_cache
+    with _category_lock:
+        _category_cache = None
+
+
 def create_post(author_id: int, title: str, body: str, tags: str | None) -> int:
-    return post_repo.create_post(author_id, title, body, tags)
+    names, tags = _normalize_tags(tags)
+    with transaction():
+        post_id = post_repo.create_post(author_id, title, body, tags)
+        tag_repo.set_post_tags(post_id, names)
+    subscription_service.fan_out(post_id, author_id)
+    search_index.upsert(post_id, title, body, tags)
+    if names:
+        _invalidate_categories()
+    events.content_changed()
+    return post_id
+
+
+def _prime(rows: list) -> list:
+    """把列表查询取到的完整文章行（含 author_name）放入请求缓存，同一请求随后按 id 读取不再查库"""
 
+    for row in rows:
+        post_repo.posts_by_id.prime(row["id"], dict(row))
+    return rows
 
-def list_posts(limit: int = 20, offset: int = 0):
-    return [_normalize_post(item) for item in post_repo.list_posts(limit, offset)]
+
+def list_posts(limit: int = 20, before=None):
+    return [_normalize_post(item) for item in _prime(post_repo.list_posts(limit, before))]
 
 
 def list_by_author(author_id: int, limit: int = 20):
@@ -23,35 +67,97 @@ def list_by_author(author_id: int, limit: int = 20):
 
 
 def get_post(post_id: int, user_id: int | None = None):
-    post = _normalize_post(post_repo.get_post(post_id))
-    if not post:
+    record = post_repo.posts_by_id.load(post_id)
+    if not record:
         return None
-    if user_id:
-        flags = reaction_service.user_flags(post_id, user_id)
-        post.update(flags)
-    else:
-        post.update({"liked": False, "favorited": False})
-    return post
+    # 请求缓存中的行可能被其他调用复用，附加字段前先复制
+    return attach_user_flags([_normalize_post(dict(record))], user_id)[0]
+
+
+def attach_user_flags(posts: list, user_id: int | None) -> list:
+    """为文章列表附加当前用户的 liked/favorited：登录用户固定多一次批量查询，匿名用户不查询"""
+
+    flags = reaction_service.user_flags_for_posts(user_id, [post["id"] for post in posts]) if user_id and posts else {}
+    for post in posts:
+        post.update(flags.get(post["id"]) or {"liked": False, "favorited": False})
+    return posts
 
 
 def update_post(post_id: int, author_id: int, title: str, body: str, tags: str | None) -> bool:
-    return post_repo.update_post(post_id, author_id, title, body, tags)
+    names, tags = _normalize_tags(tags)
+    with transaction():
+        if not post_repo.lock_own_post(post_id, author_id):
+            return False
+        post_repo.update_post(post_id, author_id, title, body, tags)
+        added, removed = tag_repo.set_post_tags(post_id, names)
+    post_repo.posts_by_id.clear(post_id)
+    search_index.upsert(post_id, title, body, tags)
+    if added or removed:
+        _invalidate_categories()
+    events.content_changed()
+    return True
 
 
 def delete_post(post_id: int, author_id: int) -> bool:
-    return post_repo.delete_post(post_id, author_id)
+    with transaction():
+        if not post_repo.lock_own_post(post_id, author_id):
+            return False
+        _, removed = tag_repo.set_post_tags(post_id, [])
+        post_repo.delete_post(post_id, author_id)
+    post_repo.posts_by_id.clear(post_id)
+    search_index.remove(post_id)
+    if removed:
+        _invalidate_categories()
+    events.content_changed()
+    return True
+
+
+def feed_for_user(user_id: int, limit: int = 20, before=None):
+    return [_normalize_post(item) for item in _prime(subscription_service.feed(user_id, limit, before))]
+
+
+def search_sort_key(keyword: str | None) -> str:
+    """检索结果的排序字段，用于分页游标；索引预热完成前或关键词切不出检索词（如只含标点）时按时间倒序查库"""
+
+    if keyword and config.SEARCH_ENGINE_ENABLED and search_index.ready and tokenize(keyword):
+        return "score"
+    return "created_at"
 
 
-def feed_for_user(user_id: int, limit: int = 20):
-    return [_normalize_post(item) for item in subscription_repo.list_feed(user_id, limit)]
+def search_posts(
+    keyword: str | None, tag: str | None, limit: int = 20, before=None, sort_key: str | None = None
+):
+    """sort_key 为 score 时走倒排索引按相关度排序，before 为 (得分, id)；否则按时间倒序查库
 
+    分页接口应传入解析游标时使用的 sort_key，避免索引恰好在两次判断之间就绪导致游标格式不一致。
+    """
 
-def search_posts(keyword: str | None, tag: str | None, limit: int = 20, offset: int = 0):
-    return [_normalize_post(item) for item in post_repo.search_posts(keyword, tag, limit, offset)]
+    if (sort_key or search_sort_key(keyword)) == "score":
+        hits = search_index.search(keyword, tag, limit, before)
+        records = post_repo.posts_by_id.load_many(post_id for post_id, _ in hits)
+        posts = []
+        for post_id, score in hits:
+            if records[post_id]:
+                post = _normalize_post(dict(records[post_id]))
+                post["score"] = score
+                posts.append(post)
+        return posts
+    return [_normalize_post(item) for item in _prime(post_repo.search_posts(keyword, tag, limit, before))]
 
 
 def list_categories(limit: int = 10):
-    return post_repo.list_categories(limit)
+    """热门标签及文章数，读取 tags 表上增量维护的计数并缓存；其他进程的修改依赖 TTL 过期"""
+
+    global _category_cache, _category_cache_at
+    now = time.monotonic()
+    with _category_lock:
+        cached = _category_cache
+        if cached is not None and now - _category_cache_at < config.CATEGORY_CACHE_TTL:
+            return cached[:limit]
+    rows = tag_repo.list_top_tags(max(limit, _CATEGORY_CACHE_SIZE))
+    with _category_lock:
+        _category_cache, _category_cache_at = rows, now
+    return rows[:limit]
 
 
 def list_reacted_posts(user_id: int, reaction_type: str, limit: int = 20):
@@ -1,13 +1,21 @@
-from repository import reaction_repo
+from repository import post_repo, reaction_repo
+from services import events
 
 
 def toggle(post_id: int, user_id: int, reaction_type: str):
-    return reaction_repo.toggle_reaction(post_id, user_id, reaction_type)
+    result = reaction_repo.toggle_reaction(post_id, user_id, reaction_type)
+    post_repo.posts_by_id.clear(post_id)
+    if result is not None:
+        # 点赞数同时展示在列表页和详情页
+        events.content_changed()
+    return result
 
 
-def user_flags(post_id: int, user_id: int) -> dict:
-    flags = reaction_repo.get_user_reactions(post_id, user_id)
+def user_flags_for_posts(user_id: int, post_ids: list) -> dict:
+    """{文章 id: {"liked": ..., "favorited": ...}}，无论多少篇文章都只查询一次"""
+
+    reactions = reaction_repo.get_user_reactions_for_posts(user_id, post_ids)
     return {
-        "liked": "like" in flags,
-        "favorited": "favorite" in flags,
+        post_id: {"liked": "like" in flags, "favorited": "favorite" in flags}
+        for post_id, flags in reactions.items()
     }
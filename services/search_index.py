@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+from repository import post_repo
+from repository.tag_repo import split_tags
+from server.metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# 中日韩文字按连续片段切分后取二元组（建索引时另加单字），拉丁字母与数字按整词
+_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[a-z0-9]+")
+_SNAPSHOT_VERSION = 3
+# BM25 参数与标题词频权重
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 3
+
+
+def tokenize(text: str, unigrams: bool = False) -> List[str]:
+    """切分为检索词：CJK 片段生成相邻二元组（单字片段保留单字），其他为小写整词
+
+    建索引时传 unigrams=True，CJK 片段中的每个字也作为检索词，单字查询才能命中多字片段。
+    """
+
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        segment = match.group()
+        if segment[0].isascii():
+            tokens.append(segment)
+            continue
+        if unigrams or len(segment) == 1:
+            tokens.extend(segment)
+        tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+class SearchIndex:
+    """文章的内存倒排索引，BM25 排序；启动时从快照恢复，再按 updated_at 与删除记录增量追平数据库"""
+
+    def __init__(self, snapshot_path: str) -> None:
+        self.snapshot_path = snapshot_path
+        # 词 -> {文章 id: 加权词频}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # 文章 id -> (词频表, 文档长度, 小写化的标签)，删除或更新时据此撤销倒排项
+        self._docs: Dict[int, Tuple[Dict[str, int], int, Tuple[str, ...]]] = {}
+        self._total_length = 0
+        self._watermark: Optional[str] = None
+        self._deleted_watermark: Optional[str] = None
+        self._dirty = False
+        self._ready = False
+        self._lock = threading.RLock()
+
+    def upsert(self, post_id: int, title: str, body: str, tags: Optional[str]) -> None:
+        terms = Counter(tokenize(body or "", unigrams=True))
+        for term, count in Counter(tokenize(title or "", unigrams=True)).items():
+            terms[term] += count * TITLE_BOOST
+        with self._lock:
+            self._remove_locked(post_id)
+            length = sum(terms.values())
+            self._docs[post_id] = (dict(terms), length, tuple(name.casefold() for name in split_tags(tags)))
+            self._total_length += length
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[post_id] = count
+            self._dirty = True
+
+    def remove(self, post_id: int) -> None:
+        with self._lock:
+            self._remove_locked(post_id)
+            self._dirty = True
+
+    def search(
+        self, query: str, tag: Optional[str], limit: int, before: Optional[Tuple[float, int]] = None
+    ) -> List[Tuple[int, float]]:
+        """返回按 (得分, id) 降序的 (文章 id, 得分)；所有检索词都须出现，before 为上一页最后一条的 (得分, id)
+
+        索引预热完成前或查询切不出检索词时，调用方应改走数据库查询，见 ready 与 tokenize。
+        """
+
+        start = time.perf_counter()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            # 从最短的倒排表开始求交集，代价取决于命中数量而不是文章总数
+            candidates: Set[int] = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return []
+            doc_count = len(self._docs)
+            avg_length = self._total_length / doc_count if doc_count else 1.0
+            idf = [math.log(1 + (doc_count - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+            scored = []
+            for post_id in candidates:
+                _, length, doc_tags = self._docs[post_id]
+                if tag and tag.casefold() not in doc_tags:
+                    continue
+                norm = K1 * (1 - B + B * length / avg_length)
+                score = 0.0
+                for weight, posting in zip(idf, postings):
+                    tf = posting[post_id]
+                    score += weight * tf * (K1 + 1) / (tf + norm)
+                score = round(score, 6)
+                if before is not None and (score, post_id) >= before:
+                    continue
+                scored.append((score, post_id))
+        top = heapq.nlargest(limit, scored)
+        metrics_collector.observe("search_ms", (time.perf_counter() - start) * 1000)
+        return [(post_id, score) for score, post_id in top]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._docs)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def start(self) -> None:
+        """在后台线程预热索引，完成后转入定期同步；预热期间检索由调用方回退到数据库"""
+
+        thread = threading.Thread(target=self._run, name="search-index-sync", daemon=True)
+        thread.start()
+
+    def sync(self) -> None:
+        """索引 updated_at 不早于水位线的文章并移除之后被删除的文章，可追上其他进程或停机期间的写入"""
+
+        rows = post_repo.list_changed_since(self._watermark)
+        for row in rows:
+            self.upsert(row["id"], row["title"], row["body"], row["tags"])
+        if rows:
+            # 同一秒内可能还有后续写入，水位线取 >= 比较，重复索引是幂等的
+            self._watermark = max(str(row["updated_at"]) for row in rows)
+        # 删除记录在读取文章之后查询，上面刚读到又随即被删除的文章也会被移除
+        deletions = post_repo.list_deleted_since(self._deleted_watermark)
+        if deletions:
+            with self._lock:
+                for row in deletions:
+                    self._remove_locked(row["post_id"])
+                self._dirty = True
+            self._deleted_watermark = max(str(row["deleted_at"]) for row in deletions)
+
+    def reconcile(self) -> None:
+        """全量比对存活的文章 id，补上删除记录已被清理的删除；只在从快照恢复时执行一次"""
+
+        live = set(post_repo.list_ids())
+        with self._lock:
+            deleted = set(self._docs).difference(live)
+            for post_id in deleted:
+                self._remove_locked(post_id)
+            if deleted:
+                self._dirty = True
+
+    def save_snapshot(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": _SNAPSHOT_VERSION,
+                "watermark": self._watermark,
+                "deleted_watermark": self._deleted_watermark,
+                "docs": {str(post_id): [terms, list(tags)] for post_id, (terms, _, tags) in self._docs.items()},
+            }
+            self._dirty = False
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as exc:
+            logger.warning("搜索索引快照读取失败，将全量重建: %s", exc)
+            return False
+        if payload.get("version") != _SNAPSHOT_VERSION:
+            return False
+        # 快照保存的是分词后的词频，恢复时只需重建倒排表
+        for key, (terms, tags) in payload["docs"].items():
+            post_id = int(key)
+            self._remove_locked(post_id)
+            length = sum(terms.values())
+            self._docs[post_id] = (terms, length, tuple(tags))
+            self._total_length += length
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[post_id] = count
+        self._watermark = payload.get("watermark")
+        self._deleted_watermark = payload.get("deleted_watermark")
+        logger.info("已从快照恢复搜索索引: %s 篇文章", len(self._docs))
+        return True
+
+    def _warm_up(self) -> None:
+        """在独立的索引对象上加载快照并全量追平，再整体换入；期间本对象的锁不被长时间占用"""
+
+        fresh = SearchIndex(self.snapshot_path)
+        restored = fresh._load_snapshot()
+        fresh.sync()
+        if restored:
+            # 快照可能早于删除记录的保留期，启动时全量比对一次
+            fresh.reconcile()
+        with self._lock:
+            self._postings, self._docs = fresh._postings, fresh._docs
+            self._total_length, self._watermark = fresh._total_length, fresh._watermark
+            self._deleted_watermark = fresh._deleted_watermark
+            self._dirty = True
+            self._ready = True
+        # 预热期间发生的写入与删除在换入时被覆盖，立即再同步一次补上
+        self.sync()
+        self.save_snapshot()
+
+    def _run(self) -> None:
+        while not self._ready:
+            try:
+                self._warm_up()
+            except Exception as exc:  # pragma: no cover - 防御性日志
+                logger.warning("搜索索引预热失败，稍后重试: %s", exc)
+                time.sleep(config.SEARCH_SYNC_INTERVAL)
+        self._maintenance_loop()
+
+    def _maintenance_loop(self) -> None:
+        last_saved = time.monotonic()
+        while True:
+            time.sleep(config.SEARCH_SYNC_INTERVAL)
+            try:
+                self.sync()
+                if time.monotonic() - last_saved >= config.SEARCH_SNAPSHOT_INTERVAL:
+                    self.save_snapshot()
+                    post_repo.prune_deletions(config.SEARCH_DELETION_RETENTION)
+                    last_saved = time.monotonic()
+            except Exception as exc:  # pragma: no cover - 防御性日志
+                logger.warning("搜索索引同步失败: %s", exc)
+
+    def _remove_locked(self, post_id: int) -> None:
+        doc = self._docs.pop(post_id, None)
+        if doc is None:
+            return
+        terms, length, _ = doc
+        self._total_length -= length
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(post_id, None)
+            if not posting:
+                del self._postings[term]
+
+
+search_index = SearchIndex(config.SEARCH_SNAPSHOT_PATH)
+metrics_collector.register_gauge("search_index_docs", lambda: len(search_index))
@@ -1,13 +1,67 @@
-from repository import subscription_repo
+import logging
+import threading
+import time
+
+import config
+from repository import post_repo, subscription_repo, timeline_repo
+
+logger = logging.getLogger(__name__)
+
+# 读时合并作者的 id 集合，按 TIMELINE_CELEBRITY_REFRESH 秒刷新
+_celebrities: list | None = None
+_celebrities_at = 0.0
+_celebrities_lock = threading.Lock()
+
+
+def _fanout_on_read_authors() -> list:
+    global _celebrities, _celebrities_at
+    now = time.monotonic()
+    with _celebrities_lock:
+        if _celebrities is not None and now - _celebrities_at < config.TIMELINE_CELEBRITY_REFRESH:
+            return _celebrities
+    authors = subscription_repo.list_fanout_on_read_authors()
+    with _celebrities_lock:
+        _celebrities, _celebrities_at = authors, now
+    return authors
 
 
 def follow(follower_id: int, author_id: int) -> None:
-    subscription_repo.follow(follower_id, author_id)
+    global _celebrities
+    if not subscription_repo.follow(follower_id, author_id, config.TIMELINE_FANOUT_LIMIT):
+        return
+    if subscription_repo.is_fanout_on_read(author_id):
+        # 本进程立即看到新标记，其他进程等待下一次刷新
+        with _celebrities_lock:
+            _celebrities = None
+        return
+    timeline_repo.backfill(follower_id, author_id, config.TIMELINE_BACKFILL_LIMIT)
 
 
 def unfollow(follower_id: int, author_id: int) -> None:
-    subscription_repo.unfollow(follower_id, author_id)
+    if subscription_repo.unfollow(follower_id, author_id):
+        timeline_repo.prune_author(follower_id, author_id)
+
+
+def fan_out(post_id: int, author_id: int) -> None:
+    """发文后推入关注者时间线；粉丝过多的作者跳过，由读取时合并"""
+
+    if subscription_repo.is_fanout_on_read(author_id):
+        return
+    try:
+        timeline_repo.fan_out(post_id)
+    except Exception as exc:  # pragma: no cover - 防御性日志
+        # 文章已提交，推送失败只影响关注流，可用 tools/rebuild_timelines.py 修复
+        logger.warning("文章 %s 推入时间线失败: %s", post_id, exc)
+
 
+def feed(user_id: int, limit: int = 20, before=None):
+    """读取时间线，再合并所关注的读时合并作者的文章，按 (created_at, id) 倒序去重"""
 
-def feed(user_id: int, limit: int = 20):
-    return subscription_repo.list_feed(user_id, limit)
+    rows = timeline_repo.list_timeline(user_id, limit, before)
+    followed = subscription_repo.list_followed_among(user_id, _fanout_on_read_authors())
+    if not followed:
+        return rows
+    # 作者被标记前推入的文章可能同时出现在两路结果中
+    merged = {row["id"]: row for row in post_repo.list_by_authors(followed, limit, before)}
+    merged.update((row["id"], row) for row in rows)
+    return sorted(merged.values(), key=lambda row: (row["created_at"], row["id"]), reverse=True)[:limit]
@@ -0,0 +1,48 @@
+"""数据维护脚本的公共部分：项目根目录加入 sys.path、--dry-run 约定，以及按文章 id 区间分批加锁处理
+
+维护脚本以 python tools/xxx.py 运行，先 import _maintenance 再导入项目模块。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.db import get_cursor, transaction  # noqa: E402
+
+
+def argument_parser(description: str, batch_size: Optional[int] = None) -> argparse.ArgumentParser:
+    """带 --dry-run 的参数解析器，给出 batch_size 时同时提供 --batch-size"""
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--dry-run", action="store_true", help="只打印发现的差异，不写回")
+    if batch_size is not None:
+        parser.add_argument("--batch-size", type=int, default=batch_size)
+    return parser
+
+
+def locked_post_batches(batch_size: int, select_sql: str) -> Iterator[Tuple[Any, List[Dict], Dict[str, int]]]:
+    """按文章 id 区间分批，每批一个事务，产出 (游标, 本批行, 区间参数)
+
+    select_sql 用 %(start)s、%(end)s 限定区间，末尾追加 FOR UPDATE 锁住本批文章，避免与并发写入交错；
+    区间参数可在同一事务内的后续查询中复用。
+    """
+
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM posts")
+        max_id = int(cursor.fetchone()["max_id"])
+    for start in range(1, max_id + 1, batch_size):
+        params = {"start": start, "end": start + batch_size - 1}
+        with transaction(), get_cursor() as cursor:
+            cursor.execute(select_sql + " FOR UPDATE", params)
+            rows = cursor.fetchall()
+            if rows:
+                yield cursor, rows, params
+
+
+def report(dry_run: bool, count: int, subject: str) -> None:
+    print(f"{'发现' if dry_run else '已修正'} {count} {subject}不一致")
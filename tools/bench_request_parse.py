@@ -0,0 +1,105 @@
+"""请求解析基准：对比旧的全量解析与按需解析的 HttpRequest
+
+用法: python tools/bench_request_parse.py [--iterations 50000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.http_request import HttpRequest  # noqa: E402
+
+
+def eager_parse(raw_data: bytes, client_addr: str) -> dict:
+    """旧版 HttpRequest.parse 的逻辑：一次性解码头部并解析查询串、Cookie 与包体"""
+
+    try:
+        header_blob, body = raw_data.split(b"\r\n\r\n", 1)
+    except ValueError:
+        header_blob = raw_data
+        body = b""
+    lines = header_blob.decode("utf-8", errors="ignore").split("\r\n")
+    method, url, version = lines[0].split()
+    path, _, query_string = url.partition("?")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    query = dict(urllib.parse.parse_qsl(query_string))
+    cookies = HttpRequest._parse_cookies(headers.get("cookie", ""))
+    form = {}
+    json_data = None
+    content_type = headers.get("content-type", "")
+    if body:
+        if "application/json" in content_type:
+            try:
+                json_data = json.loads(body.decode("utf-8"))
+            except json.JSONDecodeError:
+                json_data = None
+        elif "application/x-www-form-urlencoded" in content_type:
+            form = dict(urllib.parse.parse_qsl(body.decode("utf-8")))
+    return {
+        "method": method.upper(),
+        "path": urllib.parse.unquote(path),
+        "version": version,
+        "headers": headers,
+        "query": query,
+        "cookies": cookies,
+        "form": form,
+        "json_data": json_data,
+        "client_addr": client_addr,
+    }
+
+
+BROWSER_HEADERS = (
+    "Host: 127.0.0.1:8080\r\n"
+    "User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36\r\n"
+    "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n"
+    "Accept-Encoding: gzip, deflate, br\r\n"
+    "Accept-Language: zh-CN,zh;q=0.9,en;q=0.8\r\n"
+    "Cookie: session_id=0123456789abcdef0123456789abcdef; theme=dark; _ga=GA1.1.123456789.1700000000\r\n"
+    "Connection: keep-alive\r\n"
+)
+
+SCENARIOS = {
+    "静态资源 (只读 path)": (
+        f"GET /static/style.css HTTP/1.1\r\n{BROWSER_HEADERS}\r\n".encode(),
+        lambda req: req.path,
+    ),
+    "页面请求 (读 Cookie 与查询串)": (
+        f"GET /search?q=socket&tag=net HTTP/1.1\r\n{BROWSER_HEADERS}\r\n".encode(),
+        lambda req: (req.cookies.get("session_id"), req.query.get("q")),
+    ),
+    "JSON 提交 (读包体)": (
+        (
+            f"POST /api/posts HTTP/1.1\r\n{BROWSER_HEADERS}Content-Type: application/json\r\n\r\n"
+            + json.dumps({"title": "标题", "body": "正文" * 200, "tags": "net"}, ensure_ascii=False)
+        ).encode(),
+        lambda req: (req.cookies.get("session_id"), req.json_data["title"]),
+    ),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    for name, (raw, access) in SCENARIOS.items():
+        eager = timeit.timeit(lambda: eager_parse(raw, "bench"), number=args.iterations)
+        lazy = timeit.timeit(lambda: access(HttpRequest.parse(raw, "bench")), number=args.iterations)
+        per_eager = eager / args.iterations * 1e6
+        per_lazy = lazy / args.iterations * 1e6
+        print(f"{name:<24} 全量解析 {per_eager:7.2f} µs  按需解析 {per_lazy:7.2f} µs  ({per_eager / per_lazy:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
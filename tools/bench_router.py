@@ -0,0 +1,88 @@
+"""路由解析基准：对比旧的逐条正则匹配与哈希表 + 前缀树路由
+
+用法: python tools/bench_router.py [--iterations 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.http_request import HttpRequest  # noqa: E402
+from server.router import Router  # noqa: E402
+
+
+class LinearRouter:
+    """旧版实现：按注册顺序对每条路由做正则匹配"""
+
+    def __init__(self) -> None:
+        self._routes = []
+
+    def add_route(self, method: str, pattern: str, handler) -> None:
+        regex_pattern = re.sub(r"{([^/:]+)(?::[^}]+)?}", r"(?P<\1>[^/]+)", pattern)
+        self._routes.append((method.upper(), re.compile(f"^{regex_pattern}$"), handler))
+
+    def resolve(self, request: HttpRequest):
+        for method, pattern, handler in self._routes:
+            if method != request.method:
+                continue
+            match = pattern.match(request.path)
+            if match:
+                request.path_params = match.groupdict()
+                return handler, match.groupdict()
+        return None, {}
+
+
+def _handler(request):
+    return None
+
+
+def build(router, route_count: int) -> None:
+    """生成与 main.build_router 形态相近的路由：一半静态，一半带参数"""
+
+    for index in range(route_count):
+        if index % 2 == 0:
+            router.add_route("GET", f"/section{index}/list", _handler)
+        else:
+            router.add_route("POST", f"/api/items{index}/{{item_id:int}}/action", _handler)
+
+
+def bench(route_count: int, iterations: int) -> None:
+    last_static = (route_count - 1) // 2 * 2
+    last_param = last_static - 1 if last_static == route_count - 1 else last_static + 1
+    paths = [
+        ("GET", "/section0/list"),
+        ("GET", f"/section{last_static}/list"),
+        ("POST", f"/api/items{last_param}/42/action"),
+        ("GET", "/not/found"),
+    ]
+    requests = [HttpRequest.parse(f"{m} {p} HTTP/1.1\r\n\r\n".encode(), "bench") for m, p in paths]
+    results = []
+    for router_cls in (LinearRouter, Router):
+        router = router_cls()
+        build(router, route_count)
+
+        def run() -> None:
+            for request in requests:
+                router.resolve(request)
+
+        seconds = timeit.timeit(run, number=iterations)
+        results.append(seconds / (iterations * len(requests)) * 1e6)
+    print(f"{route_count:>6} 条路由  线性正则 {results[0]:8.2f} µs/次  前缀树 {results[1]:8.2f} µs/次")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    for route_count in (10, 30, 100, 300, 1000):
+        bench(route_count, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""多标签迁移：把 posts.tags 中逗号分隔的标签拆入 post_tags，并按 post_tags 重算 tags.post_count
+
+先执行 db/migrations/003_post_tags.sql 建表。脚本可重复执行，已迁移的文章不会重复计数。
+
+用法: python tools/migrate_post_tags.py [--dry-run] [--batch-size 500] [--recount-only]
+"""
+
+from __future__ import annotations
+
+from _maintenance import argument_parser, locked_post_batches, report
+from repository.db import get_cursor, transaction
+from repository.tag_repo import set_post_tags, split_tags
+
+
+def migrate(batch_size: int, dry_run: bool) -> int:
+    """拆分标签，返回标签有变化的文章数"""
+
+    changed = 0
+    sql = "SELECT id, tags FROM posts WHERE id BETWEEN %(start)s AND %(end)s"
+    for cursor, rows, _ in locked_post_batches(batch_size, sql):
+        for row in rows:
+            names = split_tags(row["tags"])
+            if dry_run:
+                if names:
+                    print(f"post {row['id']}: {row['tags']!r} -> {names}")
+                continue
+            added, removed = set_post_tags(row["id"], names)
+            display = ",".join(names) or None
+            if display != row["tags"]:
+                cursor.execute("UPDATE posts SET tags=%s, updated_at=updated_at WHERE id=%s", (display, row["id"]))
+            if added or removed:
+                changed += 1
+    return changed
+
+
+def recount(dry_run: bool) -> int:
+    """按 post_tags 重算每个标签的文章数，返回被修正的标签数"""
+
+    with transaction(), get_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT tags.id, tags.name, tags.post_count, COUNT(post_tags.post_id) AS actual
+            FROM tags
+            LEFT JOIN post_tags ON post_tags.tag_id = tags.id
+            GROUP BY tags.id, tags.name, tags.post_count
+            """
+        )
+        fixed = 0
+        for row in cursor.fetchall():
+            actual = int(row["actual"])
+            if row["post_count"] == actual:
+                continue
+            fixed += 1
+            print(f"tag {row['name']}: {row['post_count']} -> {actual}")
+            if not dry_run:
+                cursor.execute("UPDATE tags SET post_count=%s WHERE id=%s", (actual, row["id"]))
+    return fixed
+
+
+def main() -> None:
+    parser = argument_parser(__doc__, batch_size=500)
+    parser.add_argument("--recount-only", action="store_true", help="跳过拆分，只按 post_tags 重算计数")
+    args = parser.parse_args()
+    if not args.recount_only:
+        changed = migrate(args.batch_size, args.dry_run)
+        if not args.dry_run:
+            print(f"已迁移 {changed} 篇文章的标签")
+    report(args.dry_run, recount(args.dry_run), "个标签的计数")
+
+
+if __name__ == "__main__":
+    main()
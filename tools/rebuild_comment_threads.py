@@ -0,0 +1,74 @@
+"""评论楼层维护：按 parent_id 回填 comments.root_id，并重算楼层回复数与 posts.comment_count
+
+先执行 db/migrations/005_comment_threads.sql。脚本可重复执行，只写回有差异的行。
+
+用法: python tools/rebuild_comment_threads.py [--dry-run] [--batch-size 200]
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from _maintenance import argument_parser, locked_post_batches, report
+
+
+def resolve_roots(comments: List[Dict]) -> Dict[int, Optional[int]]:
+    """按 id 正序一次遍历求出每条评论所在楼层；父评论缺失或属于其他文章的视为顶层评论"""
+
+    roots: Dict[int, Optional[int]] = {}
+    for comment in comments:
+        parent_id = comment["parent_id"]
+        if parent_id in roots:
+            roots[comment["id"]] = roots[parent_id] or parent_id
+        else:
+            roots[comment["id"]] = None
+    return roots
+
+
+def rebuild(batch_size: int, dry_run: bool) -> int:
+    """返回评论楼层或计数有变化的文章数"""
+
+    changed = 0
+    sql = "SELECT id, comment_count FROM posts WHERE id BETWEEN %(start)s AND %(end)s"
+    for cursor, posts, params in locked_post_batches(batch_size, sql):
+        cursor.execute(
+            """
+            SELECT id, post_id, parent_id, root_id, reply_count FROM comments
+            WHERE post_id BETWEEN %(start)s AND %(end)s ORDER BY post_id, id
+            """,
+            params,
+        )
+        by_post: Dict[int, List[Dict]] = {}
+        for row in cursor.fetchall():
+            by_post.setdefault(row["post_id"], []).append(row)
+        for post in posts:
+            comments = by_post.get(post["id"], [])
+            roots = resolve_roots(comments)
+            reply_counts = Counter(root for root in roots.values() if root)
+            updates = [
+                (roots[row["id"]], reply_counts.get(row["id"], 0), row["id"])
+                for row in comments
+                if row["root_id"] != roots[row["id"]] or row["reply_count"] != reply_counts.get(row["id"], 0)
+            ]
+            if not updates and post["comment_count"] == len(comments):
+                continue
+            changed += 1
+            print(f"post {post['id']}: comments {post['comment_count']} -> {len(comments)}, {len(updates)} 条评论需修正")
+            if dry_run:
+                continue
+            if updates:
+                cursor.executemany("UPDATE comments SET root_id=%s, reply_count=%s WHERE id=%s", updates)
+            cursor.execute(
+                "UPDATE posts SET comment_count=%s, updated_at=updated_at WHERE id=%s", (len(comments), post["id"])
+            )
+    return changed
+
+
+def main() -> None:
+    args = argument_parser(__doc__, batch_size=200).parse_args()
+    report(args.dry_run, rebuild(args.batch_size, args.dry_run), "篇文章的评论楼层或计数")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""关注流时间线维护：按 subscriptions 重算粉丝数与读时合并标记，并把文章回填进关注者的时间线
+
+先执行 db/migrations/004_timelines.sql。脚本可重复执行，已存在的时间线条目会被跳过。
+
+用法: python tools/rebuild_timelines.py [--dry-run] [--fanout-limit 5000]
+"""
+
+from __future__ import annotations
+
+from _maintenance import argument_parser, report
+import config
+from repository.db import get_cursor, transaction
+
+
+def recount(fanout_limit: int, dry_run: bool) -> int:
+    """重算 users.follower_count 与 fanout_on_read，返回被修正的用户数"""
+
+    with transaction(), get_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT users.id, users.follower_count, users.fanout_on_read,
+                   COUNT(subscriptions.id) AS actual
+            FROM users
+            LEFT JOIN subscriptions ON subscriptions.author_id = users.id
+            GROUP BY users.id, users.follower_count, users.fanout_on_read
+            """
+        )
+        fixed = 0
+        for row in cursor.fetchall():
+            actual = int(row["actual"])
+            fanout_on_read = int(actual > fanout_limit)
+            if row["follower_count"] == actual and row["fanout_on_read"] == fanout_on_read:
+                continue
+            fixed += 1
+            print(f"user {row['id']}: followers {row['follower_count']} -> {actual}, fanout_on_read -> {fanout_on_read}")
+            if not dry_run:
+                cursor.execute(
+                    "UPDATE users SET follower_count=%s, fanout_on_read=%s WHERE id=%s",
+                    (actual, fanout_on_read, row["id"]),
+                )
+    return fixed
+
+
+def backfill(dry_run: bool) -> int:
+    """逐个作者把全部文章推入其关注者的时间线，返回写入的条目数"""
+
+    with get_cursor() as cursor:
+        cursor.execute("SELECT id FROM users WHERE fanout_on_read = 0 AND follower_count > 0")
+        authors = [row["id"] for row in cursor.fetchall()]
+    inserted = 0
+    for author_id in authors:
+        if dry_run:
+            continue
+        # 每位作者一个事务，单次写入量受粉丝数上限约束
+        with transaction(), get_cursor() as cursor:
+            inserted += cursor.execute(
+                """
+                INSERT IGNORE INTO timelines (user_id, post_id, author_id, created_at)
+                SELECT subscriptions.follower_id, posts.id, posts.author_id, posts.created_at
+                FROM subscriptions
+                JOIN posts ON posts.author_id = subscriptions.author_id
+                WHERE subscriptions.author_id = %s
+                """,
+                (author_id,),
+            )
+    print(f"{len(authors)} 位作者的文章需要推入时间线")
+    return inserted
+
+
+def main() -> None:
+    parser = argument_parser(__doc__)
+    parser.add_argument("--fanout-limit", type=int, default=config.TIMELINE_FANOUT_LIMIT)
+    args = parser.parse_args()
+    report(args.dry_run, recount(args.fanout_limit, args.dry_run), "位用户的粉丝数")
+    inserted = backfill(args.dry_run)
+    if not args.dry_run:
+        print(f"已写入 {inserted} 条时间线记录")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""点赞/收藏计数维护：按 reactions 表重算 posts.like_count 与 favorite_count
+
+旧库先执行 db/migrations/006_reaction_counters.sql。脚本可重复执行，只写回有差异的行。
+
+用法: python tools/repair_reaction_counts.py [--dry-run] [--batch-size 1000]
+"""
+
+from __future__ import annotations
+
+from _maintenance import argument_parser, locked_post_batches, report
+
+COUNTS_SQL = """
+    SELECT posts.id, posts.like_count, posts.favorite_count,
+           COALESCE(react.like_count, 0) AS actual_like_count,
+           COALESCE(react.favorite_count, 0) AS actual_favorite_count
+    FROM posts
+    LEFT JOIN (
+        SELECT post_id,
+               SUM(reaction_type = 'like') AS like_count,
+               SUM(reaction_type = 'favorite') AS favorite_count
+        FROM reactions
+        WHERE post_id BETWEEN %(start)s AND %(end)s
+        GROUP BY post_id
+    ) AS react ON react.post_id = posts.id
+    WHERE posts.id BETWEEN %(start)s AND %(end)s
+"""
+
+
+def repair(batch_size: int, dry_run: bool) -> int:
+    """比对并修正计数，返回被修正的文章数"""
+
+    fixed = 0
+    for cursor, rows, _ in locked_post_batches(batch_size, COUNTS_SQL):
+        for row in rows:
+            likes, favorites = int(row["actual_like_count"]), int(row["actual_favorite_count"])
+            if row["like_count"] == likes and row["favorite_count"] == favorites:
+                continue
+            fixed += 1
+            print(
+                f"post {row['id']}: like {row['like_count']} -> {likes}, "
+                f"favorite {row['favorite_count']} -> {favorites}"
+            )
+            if not dry_run:
+                cursor.execute(
+                    "UPDATE posts SET like_count=%s, favorite_count=%s, updated_at=updated_at WHERE id=%s",
+                    (likes, favorites, row["id"]),
+                )
+    return fixed
+
+
+def main() -> None:
+    args = argument_parser(__doc__, batch_size=1000).parse_args()
+    report(args.dry_run, repair(args.batch_size, args.dry_run), "篇文章的计数")
+
+
+if __name__ == "__main__":
+    main()